@@ -63,7 +63,8 @@ from worlds.models import (
     RoomFlag,
     RoomDetail,
     Door,
-    WorldLocks)
+    WorldLocks,
+    bulk_room_context)
 
 
 # Common to both RoomActionSerializer and RoomCheckSerializer
@@ -550,11 +551,12 @@ class MoveZoneSerializer(serializers.Serializer):
 
         try:
             updated_rooms = []
-            for room in rooms_qs:
-                setattr(room, axis, F(axis) + distance)
-                room.save()
-                room.update_live_instances()
-                updated_rooms.append(room)
+            with bulk_room_context(zone.world):
+                for room in rooms_qs:
+                    setattr(room, axis, F(axis) + distance)
+                    room.save()
+                    room.update_live_instances()
+                    updated_rooms.append(room)
         except IntegrityError:
             raise serializers.ValidationError("Coordinate conflict")
 
@@ -576,6 +578,9 @@ class RoomFlagField(serializers.Field):
         return room
 
     def to_representation(self, room):
+        flags = getattr(room, '_prefetched_objects_cache', {}).get('flags')
+        if flags is not None:
+            return any(flag.code == self.code for flag in flags)
         return room.flags.filter(code=self.code).exists()
 
     def to_internal_value(self, data):
@@ -773,17 +778,7 @@ class MapRoomSerializer(serializers.ModelSerializer):
 
     @staticmethod
     def prefetch_map(qs):
-        return qs.prefetch_related(
-            'north',
-            'east',
-            'west',
-            'south',
-            'up',
-            'down',
-            'zone',
-            'world',
-            'flags',
-        )
+        return Room.objects.prefetch_map(qs)
 
 
 
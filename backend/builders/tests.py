@@ -3,6 +3,8 @@ import collections
 
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework import serializers
 from rest_framework.reverse import reverse
@@ -238,6 +240,23 @@ class TestMoveZone(BuilderTestCase):
         self.assertEqual(len(resp.data), 1)
         self.assertEqual(resp.data[0]['x'], 2)
 
+    def test_move_zone_clears_map_once(self):
+        self.room.create_at('east')
+        World.objects.filter(pk=self.world.pk).update(full_map='{}')
+        ep = reverse('builder-zone-move', args=[self.world.pk, self.zone.pk])
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post(ep, {
+                'direction': 'east',
+                'distance': 2,
+            })
+        self.assertEqual(resp.status_code, 201)
+        world_updates = [
+            query for query in ctx.captured_queries
+            if query['sql'].startswith('UPDATE "worlds_world"')]
+        self.assertEqual(len(world_updates), 1)
+        self.world.refresh_from_db()
+        self.assertIsNone(self.world.full_map)
+
 
 class TestRoomEndpoints(BuilderTestCase):
 
@@ -694,6 +713,19 @@ class RoomFlagsTests(BuilderTestCase):
         RoomFlag.objects.get(room_id=self.room.pk,
                              code=adv_consts.ROOM_FLAG_NO_ROAM)
 
+    def test_prefetched_room_flags(self):
+        RoomFlag.objects.create(
+            code=adv_consts.ROOM_FLAG_NO_ROAM,
+            room=self.room)
+        room = Room.objects.prefetch_builder(
+            Room.objects.filter(pk=self.room.pk)).get()
+        with self.assertNumQueries(0):
+            self.assertTrue(builder_serializers.RoomFlagField(
+                code=adv_consts.ROOM_FLAG_NO_ROAM).to_representation(room))
+            self.assertFalse(builder_serializers.RoomFlagField(
+                code=adv_consts.ROOM_FLAG_DARK).to_representation(room))
+            self.assertEqual(list(room.details.all()), [])
+
 
 class RoomActionTests(BuilderTestCase):
 
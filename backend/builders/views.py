@@ -787,7 +787,7 @@ class ZoneBuilderViewSet(WorldCreationMixin,
         move_data = serializer.save()
 
         updated_rooms = builder_serializers.RoomBuilderSerializer(
-            move_data['rooms'],
+            Room.objects.prefetch_builder(move_data['rooms']),
             context={'request': request},
             many=True).data
 
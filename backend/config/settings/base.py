@@ -121,6 +121,13 @@ DATABASES = {
     }
 }
 
+# Seconds to keep a database connection open between requests / tasks.
+# Defaults to 0 (close after each request) because the Forge API is served
+# over ASGI, where persistent connections are not reused across requests.
+# Celery workers are single-threaded and should set this to benefit from
+# warm connections.
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 0))
+
 TESTING = False
 
 # Password validation
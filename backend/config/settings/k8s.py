@@ -10,6 +10,8 @@ DATABASES = {
         'HOST': os.getenv('WR_PG_HOST', 'localhost'),
         'PASSWORD': os.getenv('WR_PG_PASSWORD'),
         'PORT': os.getenv('WR_PG_PORT', 5432),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
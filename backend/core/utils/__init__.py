@@ -1,6 +1,7 @@
 import calendar
 from contextlib import contextmanager
 import datetime
+from functools import lru_cache
 import inspect
 import json
 import subprocess
@@ -27,10 +28,14 @@ def get_classes_in_module(module, base_cls):
     return classes
 
 
+@lru_cache(maxsize=None)
 def CamelCase__to__camel_case(name):
     """
     From http://stackoverflow.com/questions/1175208/
 
+    Memoized: it's called with model class names to build keys, so the set
+    of inputs is small and the same few names are converted constantly.
+
     >>> CamelCase__to__camel_case('CamelCase')
     'camel_case'
     >>> CamelCase__to__camel_case('CamelCamelCase')
@@ -59,7 +59,7 @@ class WorldCardListView(generics.ListAPIView):
         return qs_by_pks(World, world_ids).annotate(
             num_characters=Subquery(players_count_subquery[:1],
                                     output_field=IntegerField())
-        ).select_related('config')
+        ).select_related('config', 'instance_of__config')
 
 
 class RecentChars(generics.ListAPIView):
@@ -113,7 +113,8 @@ class AllWorlds(generics.ListAPIView):
             id__in=(4, 83),
         ).values_list('id', flat=True)
         world_ids = [4] + list(world_ids)
-        return qs_by_pks(World, world_ids)
+        return qs_by_pks(World, world_ids).select_related(
+            'config', 'instance_of__config')
 
 
 class OnlineWorlds(generics.ListAPIView):
@@ -123,7 +124,8 @@ class OnlineWorlds(generics.ListAPIView):
         return World.objects.filter(
             is_multiplayer=True,
             context_id__isnull=False,
-            lifecycle=api_consts.WORLD_STATE_RUNNING)
+            lifecycle=api_consts.WORLD_STATE_RUNNING,
+        ).select_related('context__config', 'context__instance_of__config')
 
 
 class UserWorlds(generics.ListAPIView):
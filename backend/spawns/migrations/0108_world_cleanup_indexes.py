@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spawns', '0107_player_effects'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['world', 'is_pending_deletion', 'pending_deletion_ts'], name='spawns_item_world_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('container_id__isnull', True)), fields=['world'], name='spawns_item_world_loose_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mob',
+            index=models.Index(fields=['world', 'is_pending_deletion', 'pending_deletion_ts'], name='spawns_mob_world_pending_idx'),
+        ),
+    ]
@@ -590,6 +590,10 @@ class Mob(CharMixin, MobMixin, AdventBaseModel):
         indexes = [
             models.Index(fields=['created_ts']),
             models.Index(fields=['is_pending_deletion']),
+            # World cleanup of stale pending deletion mobs
+            models.Index(
+                fields=['world', 'is_pending_deletion', 'pending_deletion_ts'],
+                name='spawns_mob_world_pending_idx'),
         ]
 
     def create_corpse(self):
@@ -695,6 +699,14 @@ class Item(ItemMixin, AdventBaseModel):
             models.Index(fields=['container_type']),
             models.Index(fields=['is_persistent']),
             models.Index(fields=['created_ts']),
+            # World cleanup of stale pending deletion / uncontained items
+            models.Index(
+                fields=['world', 'is_pending_deletion', 'pending_deletion_ts'],
+                name='spawns_item_world_pending_idx'),
+            models.Index(
+                fields=['world'],
+                condition=models.Q(container_id__isnull=True),
+                name='spawns_item_world_loose_idx'),
         ]
 
 
@@ -7,6 +7,7 @@ from core.utils import is_ascii
 
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Prefetch
 from django.utils import timezone
 
 from rest_framework import serializers
@@ -30,6 +31,7 @@ from builders.models import (
     MerchantInventory,
     Faction,
     FactionAssignment,
+    FactionRank,
     FactionRelationship,
     RoomAction,
     Trigger,
@@ -306,7 +308,13 @@ class AnimateWorldSerializer(serializers.ModelSerializer):
         root_world = root_world.instance_of or root_world
 
         factions = {}
-        for faction in root_world.world_factions.all():
+        world_factions = root_world.world_factions.select_related(
+            'death_room'
+        ).prefetch_related(Prefetch(
+            'ranks',
+            queryset=FactionRank.objects.order_by('standing'),
+            to_attr='ordered_ranks'))
+        for faction in world_factions:
 
             if faction.death_room:
                 death_room_key = faction.death_room.get_game_key(spawn_world)
@@ -315,7 +323,7 @@ class AnimateWorldSerializer(serializers.ModelSerializer):
 
             faction_ranks = []
             index = 0
-            for rank in faction.ranks.order_by('standing'):
+            for rank in faction.ordered_ranks:
                 index += 1
                 faction_ranks.append({
                     'standing': rank.standing,
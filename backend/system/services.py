@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.utils import timezone
 
 from config import constants as api_consts
@@ -7,6 +8,11 @@ from system.models import Nexus, SiteControl
 from users.models import User
 from worlds.models import World
 
+# Staff clients poll the panel every few seconds, so a short-lived copy
+# absorbs repeated polls without serving noticeably stale data.
+STAFF_PANEL_CACHE_KEY = 'staff_panel'
+STAFF_PANEL_CACHE_TTL = 2
+
 def get_staff_panel():
     """
     Get the staff panel data.
@@ -108,8 +114,17 @@ def get_staff_panel():
 
     return panel_data
 
+def get_cached_staff_panel():
+    panel_data = cache.get(STAFF_PANEL_CACHE_KEY)
+    if panel_data is None:
+        panel_data = get_staff_panel()
+        cache.set(STAFF_PANEL_CACHE_KEY, panel_data, STAFF_PANEL_CACHE_TTL)
+    return panel_data
+
 def update_staff_panel():
     from fastapi_app.forge_ws import publish
+    panel_data = get_staff_panel()
+    cache.set(STAFF_PANEL_CACHE_KEY, panel_data, STAFF_PANEL_CACHE_TTL)
     publish(
         pub='staff.panel',
-        data=get_staff_panel())
+        data=panel_data)
@@ -1,5 +1,6 @@
 import mock
 
+from django.core.cache import cache
 from django.test import TestCase
 from rest_framework.reverse import reverse
 
@@ -8,7 +9,9 @@ from config import constants as adv_consts
 from builders.models import HousingBlock, Quest, MobTemplate
 from spawns.models import Player, Item, PlayerEnquire, Clan, ClanMembership, Mob
 from tests.base import WorldTestCase
+from system.models import Nexus, SiteControl
 from system.serializers import RunLoadersSerializer
+from system.services import update_staff_panel
 from worlds.models import World, Zone
 
 
@@ -628,3 +631,90 @@ class ClanTests(SystemTestCase):
             'member': member.name,
         })
         self.assertEqual(resp.status_code, 400)
+
+
+class NexusDataTests(WorldTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_authenticate(self.user)
+        self.nexus = Nexus.objects.create(name='nexus-1')
+
+    def test_nexus_worlds(self):
+        self.world.is_multiplayer = True
+        self.world.save()
+        mpw = self.world.create_spawn_world()
+        mpw.nexus = self.nexus
+        mpw.save()
+
+        resp = self.client.get(
+            reverse('staff-nexus-data', args=[self.nexus.pk]))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.data['worlds']), 1)
+        world_data = resp.data['worlds'][0]
+        self.assertEqual(world_data['id'], mpw.id)
+        self.assertEqual(world_data['key'], mpw.key)
+        self.assertEqual(world_data['context_id'], self.world.id)
+        self.assertEqual(world_data['state'], mpw.lifecycle)
+
+
+class StaffPanelTests(WorldTestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_authenticate(self.user)
+        self.site_control = SiteControl.objects.create(name='prod')
+
+    def test_staff_panel_is_cached(self):
+        ep = reverse('staff_panel')
+        resp = self.client.get(ep)
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(resp.data['maintenance_mode'])
+
+        self.site_control.maintenance_mode = True
+        self.site_control.save()
+        resp = self.client.get(ep)
+        self.assertFalse(resp.data['maintenance_mode'])
+
+        # Publishing a panel update refreshes the cached copy
+        with mock.patch('fastapi_app.forge_ws.publish'):
+            update_staff_panel()
+        resp = self.client.get(ep)
+        self.assertTrue(resp.data['maintenance_mode'])
+
+
+class StaffInvalidateUserEmailTests(WorldTestCase):
+
+    def test_invalidate_email(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_authenticate(self.user)
+        target = self.create_user('bad@example.com')
+
+        resp = self.client.post(
+            reverse('staff-invalidate-email', args=[target.pk]))
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.data, {'id': target.id, 'is_invalid': True})
+        target.refresh_from_db()
+        self.assertTrue(target.is_invalid)
+
+
+class SkillsTests(TestCase):
+
+    def test_all_skills(self):
+        resp = self.client.get(reverse('all-skills'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            set(resp.json().keys()),
+            {archetype for archetype in adv_consts.ARCHETYPES if archetype})
+
+    def test_archetype_skills(self):
+        resp = self.client.get(
+            reverse('archetype-skills', args=[adv_consts.ARCHETYPE_WARRIOR]))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json(), {'core': [], 'flex': []})
@@ -1,4 +1,5 @@
 from datetime import timedelta
+from functools import lru_cache
 import json
 
 from django.conf import settings
@@ -39,7 +40,7 @@ from spawns.services import WorldGate
 from system import serializers as system_serializers
 from system import tasks as system_tasks
 from system.models import Nexus
-from system.services import get_staff_panel
+from system.services import get_cached_staff_panel
 from users import (serializers as user_serializers, models as user_models)
 from users.models import User
 from worlds.models import World, Room, RoomFlag
@@ -950,7 +951,7 @@ staff_search = StaffSearch.as_view()
 class StaffPanel(APIView, StaffViewMixin):
 
     def get(self, request, format=None):
-        panel_data = get_staff_panel()
+        panel_data = get_cached_staff_panel()
         return Response(panel_data)
 
 staff_panel = StaffPanel.as_view()
@@ -975,11 +976,15 @@ staff_teardown = StaffTeardown.as_view()
 class StaffInvalidateUserEmail(APIView, StaffViewMixin):
 
     def post(self, request, user_pk=None, format=None):
-        user = get_object_or_404(User, pk=user_pk)
+        # Herald merges the response into the user it already has loaded,
+        # so only the changed flag is returned.
+        user = get_object_or_404(User.objects.only('id'), pk=user_pk)
         user.is_invalid = True
-        user.save()
-        return Response(system_serializers.UserInfoSerializer(user).data,
-                        status=status.HTTP_201_CREATED)
+        user.save(update_fields=['is_invalid'])
+        return Response({
+            'id': user.id,
+            'is_invalid': user.is_invalid,
+        }, status=status.HTTP_201_CREATED)
 
 invalidate_email = StaffInvalidateUserEmail.as_view()
 
@@ -998,17 +1003,23 @@ nexus_details = NexusViewSet.as_view({
 class NexusData(APIView, StaffViewMixin):
 
     def get(self, request, pk=None, format=None):
+        cache_key = 'nexus_data_%s' % pk
+        cached_data = cache.get(cache_key)
+        if cached_data is not None:
+            return Response(cached_data)
+
         nexus = get_object_or_404(Nexus, pk=pk)
 
         if nexus.name == 'nexus-sandbox':
             worlds = []
         else:
-            worlds = [
-                system_serializers.WorldStaffInfoSerializer(world).data
-                for world in nexus.worlds.filter(
+            worlds = system_serializers.WorldStaffInfoSerializer(
+                nexus.worlds.filter(
                     is_multiplayer=True
-                ).order_by('-change_state_ts')
-            ]
+                ).only(
+                    'id', 'name', 'lifecycle', 'context', 'change_state_ts',
+                ).order_by('-change_state_ts'),
+                many=True).data
 
         if nexus.state == api_consts.NEXUS_STATE_READY:
             rdb = nexus.rdb
@@ -1018,16 +1029,20 @@ class NexusData(APIView, StaffViewMixin):
             timings = []
             dbsize = 0
 
-        return Response({
+        nexus_data = {
             'dbsize': dbsize,
             'timings': timings,
             'now': expiration_ts(0),
             'worlds': worlds,
-        })
+        }
+        cache.set(cache_key, nexus_data, 1)
+        return Response(nexus_data)
 
 
 # ==== Public Views ====
 
+# Archetype is a free-form URL segment, so keep the memo bounded.
+@lru_cache(maxsize=32)
 def get_archetype_skills(archetype):
     # WR2 does not currently expose archetype command metadata here.
     return {
@@ -1035,6 +1050,15 @@ def get_archetype_skills(archetype):
         'flex': [],
     }
 
+
+@lru_cache(maxsize=1)
+def get_all_skills():
+    return {
+        archetype: get_archetype_skills(archetype)
+        for archetype in adv_consts.ARCHETYPES
+        if archetype
+    }
+
 class ArchetypeSkills(APIView):
 
     permission_classes = ()
@@ -1048,8 +1072,4 @@ class AllSkills(APIView):
     permission_classes = ()
 
     def get(self, request, format=None):
-        return Response({
-            archetype: get_archetype_skills(archetype)
-            for archetype in adv_consts.ARCHETYPES
-            if archetype
-        })
+        return Response(get_all_skills())
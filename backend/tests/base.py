@@ -11,18 +11,25 @@ User = get_user_model()
 
 class WorldTestCase(APITestCase):
 
-    def setUp(self):
-        super().setUp()
-        self.user = User.objects.create_user('joe@example.com', 'p')
-        self.world_config = WorldConfig.objects.create()
-        self.world = World.objects.new_world(
+    @classmethod
+    def setUpTestData(cls):
+        # Built once per class; each test gets its own copy of these
+        # attributes and its database changes are rolled back.
+        super().setUpTestData()
+        cls.user = User.objects.create_user('joe@example.com', 'p')
+        cls.world_config = WorldConfig.objects.create()
+        cls.world = World.objects.new_world(
             name='An Island',
-            author=self.user,
-            config=self.world_config)
-        self.spawn_world = self.world.create_spawn_world()
-        self.zone = self.world.zones.all()[0]
-        self.room = self.zone.rooms.all()[0]
-        self.player = self.create_player('Joe')
+            author=cls.user,
+            config=cls.world_config)
+        cls.spawn_world = cls.world.create_spawn_world()
+        cls.zone = cls.world.zones.all()[0]
+        cls.room = cls.zone.rooms.all()[0]
+        cls.player = Player.objects.create(
+            name='Joe',
+            room=cls.room,
+            user=cls.user,
+            world=cls.spawn_world)
 
     def make_system_user(self):
         self.user.email = settings.SYSTEM_USER_EMAIL
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0021_loginlinkrequest'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='loginlinkrequest',
+            name='code_hash',
+            field=models.CharField(max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='emailconfirmation',
+            index=models.Index(fields=['code'], name='users_email_code_1b7fcb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loginlinkrequest',
+            index=models.Index(fields=['code_hash', '-created_ts'], name='users_login_code_ha_2d7da3_idx'),
+        ),
+    ]
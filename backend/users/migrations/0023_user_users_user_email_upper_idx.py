@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:19
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0022_alter_loginlinkrequest_code_hash_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Upper('email'), name='users_user_email_upper_idx'),
+        ),
+    ]
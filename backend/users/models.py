@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils.translation import gettext_lazy as _
 
 from config import constants as api_consts
@@ -100,6 +101,13 @@ class User(AbstractUser):
 
     objects = UserManager()
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # email__iexact compiles to UPPER(email) = UPPER(...) on
+            # PostgreSQL, which cannot use the plain unique index.
+            models.Index(Upper('email'), name='users_user_email_upper_idx'),
+        ]
+
     @property
     def key(self):
         return "user.%s" % self.id
@@ -143,11 +151,22 @@ class EmailConfirmation(BaseModel):
                              on_delete=models.CASCADE,
                              related_name='email_confirmations')
 
+    class Meta(BaseModel.Meta):
+        indexes = [
+            models.Index(fields=['code']),
+        ]
+
 
 class LoginLinkRequest(BaseModel):
     user = models.ForeignKey(User,
                              on_delete=models.CASCADE,
                              related_name='login_link_requests')
-    code_hash = models.CharField(max_length=64, db_index=True)
+    code_hash = models.CharField(max_length=64)
     used_ts = models.DateTimeField(**optional)
     expires_ts = models.DateTimeField(db_index=True)
+
+    class Meta(BaseModel.Meta):
+        indexes = [
+            # Serves the confirm lookup, newest request first.
+            models.Index(fields=['code_hash', '-created_ts']),
+        ]
@@ -1,10 +1,14 @@
 import hashlib
 import secrets
 from datetime import timedelta
+from functools import partial
 
 from django.conf import settings
 from django.contrib.auth import (
     get_user_model)
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 
 from google.oauth2 import id_token
@@ -12,7 +16,7 @@ from google.auth.transport import requests as gauth_requests
 
 from rest_framework import serializers, validators
 
-from core import mail
+from users import tasks as user_tasks
 from users.models import (
     EmailConfirmation,
     LoginLinkRequest)
@@ -20,6 +24,14 @@ from users.models import (
 
 User = get_user_model()
 
+# How long a verified Google credential is remembered, so that a double
+# submit from the client does not pay for signature verification twice.
+GOOGLE_IDINFO_CACHE_TTL = 10
+
+# Shared transport so that the connection to Google's certificate endpoint
+# is kept alive across logins instead of opening a new session each time.
+_GAUTH_REQUEST = gauth_requests.Request()
+
 
 class UserSerializer(serializers.ModelSerializer):
 
@@ -62,8 +74,42 @@ class UserSerializer(serializers.ModelSerializer):
         return user.date_joined.strftime('%m/%d')
 
 
+_DATE_JOINED_FIELD = serializers.DateTimeField()
+
+def serialize_user(user):
+    """
+    Same output as UserSerializer(user).data, built as a plain dict so that
+    the auth endpoints don't construct and bind a full ModelSerializer just
+    to render their response.
+    """
+    return {
+        'id': user.id,
+        'email': user.email,
+        'name': user.username,
+        'key': user.key,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'is_admin': user.is_staff,
+        'is_staff': user.is_staff,
+        'is_temporary': user.is_temporary,
+        'is_confirmed': user.is_confirmed,
+        'is_invalid': user.is_invalid,
+        'cod_accepted': user.cod_accepted,
+        'num_players': 0,
+        'date_joined': _DATE_JOINED_FIELD.to_representation(user.date_joined),
+        'date_joined_str': user.date_joined.strftime('%m/%d'),
+        'send_newsletter': user.send_newsletter,
+        'use_grapevine': user.use_grapevine,
+        'accessibility_mode': user.accessibility_mode,
+        'name_recognition': user.name_recognition,
+        'multiplayer_worlds': user.multiplayer_worlds,
+    }
+
+
 def _hash_token(token):
-    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+    # Issued tokens are URL-safe base64, so any non-ASCII input can never
+    # match; replacing it keeps hashing total on user-supplied values.
+    return hashlib.sha256(token.encode('ascii', 'replace')).hexdigest()
 
 def _create_login_link_for_user(user):
     # Invalidate any outstanding login links for this user.
@@ -78,7 +124,9 @@ def _create_login_link_for_user(user):
         user=user,
         code_hash=_hash_token(token),
         expires_ts=expires_ts)
-    mail.send_login_link(user.email, token)
+    # Send once the link is committed, outside of the request cycle.
+    transaction.on_commit(
+        partial(user_tasks.send_login_link.delay, user.email, token))
     return token
 
 
@@ -96,11 +144,9 @@ class EmailLoginRequestSerializer(serializers.Serializer):
         email = validated_data['email']
         user = self.user
         if user is None:
-            user = User.objects.create(
-                email=email,
-                is_confirmed=False)
+            user = User(email=email, is_confirmed=False)
             user.set_unusable_password()
-            user.save()
+            user.save(force_insert=True)
         elif user.is_invalid:
             return None
 
@@ -113,15 +159,14 @@ class EmailLoginConfirmSerializer(serializers.Serializer):
 
     def validate_token(self, value):
         token_hash = _hash_token(value)
+        # Used and expired links are indistinguishable from unknown ones.
         self.login_request = LoginLinkRequest.objects.select_related('user').filter(
-            code_hash=token_hash).order_by('-created_ts').first()
+            code_hash=token_hash,
+            used_ts__isnull=True,
+            expires_ts__gt=timezone.now(),
+        ).order_by('-created_ts').first()
         if not self.login_request:
             raise serializers.ValidationError("Invalid or expired login link.")
-
-        if self.login_request.used_ts:
-            raise serializers.ValidationError("Login link has already been used.")
-        if self.login_request.expires_ts <= timezone.now():
-            raise serializers.ValidationError("Invalid or expired login link.")
         return value
 
     def create(self, validated_data):
@@ -141,27 +186,27 @@ class EmailLoginConfirmSerializer(serializers.Serializer):
 
 class SignupSerializer(serializers.Serializer):
 
-    email = serializers.EmailField(
-        validators=[validators.UniqueValidator(queryset=User.objects.all())])
+    # Uniqueness of email and username is checked with a single query in
+    # validate() rather than with a UniqueValidator per field.
+    email = serializers.EmailField()
     username = serializers.CharField(
         required=False,
-        allow_blank=True,
-        validators=[validators.UniqueValidator(queryset=User.objects.all())])
+        allow_blank=True)
     first_name = serializers.CharField(required=False, allow_blank=True)
     last_name = serializers.CharField(required=False, allow_blank=True)
     send_newsletter = serializers.BooleanField(default=False)
 
     def create(self, validated_data):
         # Create user
-        user = User.objects.create(
+        user = User(
             email=validated_data['email'],
             username=validated_data.get('username', None),
             send_newsletter=validated_data.get('send_newsletter', False),
             first_name=validated_data.get('first_name', None),
-            last_name=validated_data.get('last_name', None))
-
+            last_name=validated_data.get('last_name', None),
+            ip=validated_data.get('ip'))
         user.set_unusable_password()
-        user.save()
+        user.save(force_insert=True)
 
         _create_login_link_for_user(user)
 
@@ -170,10 +215,24 @@ class SignupSerializer(serializers.Serializer):
     def validate_username(self, value):
         return None if not value else value
 
-    def validate_email(self, value):
-        if User.objects.filter(email__iexact=value).exists():
-            raise serializers.ValidationError("Email already registered.")
-        return value
+    def validate(self, data):
+        email = data['email']
+        username = data.get('username')
+
+        clash_filter = Q(email__iexact=email)
+        if username:
+            clash_filter |= Q(username=username)
+
+        errors = {}
+        for clash_email, clash_username in User.objects.filter(
+                clash_filter).values_list('email', 'username'):
+            if clash_email.lower() == email.lower():
+                errors['email'] = ["This field must be unique."]
+            if username and clash_username == username:
+                errors['username'] = ["This field must be unique."]
+        if errors:
+            raise serializers.ValidationError(errors)
+        return data
 
 
 class SaveTempCharSerializer(SignupSerializer):
@@ -189,10 +248,14 @@ class SaveTempCharSerializer(SignupSerializer):
         user.first_name = validated_data.get('first_name', None)
         user.last_name = validated_data.get('last_name', None)
 
+        update_fields = [
+            'email', 'is_temporary', 'send_newsletter', 'password',
+            'first_name', 'last_name']
         if validated_data.get('username'):
             user.username = validated_data['username']
+            update_fields.append('username')
 
-        user.save()
+        user.save(update_fields=update_fields)
 
         _create_login_link_for_user(user)
 
@@ -205,7 +268,8 @@ class EmailConfirmationSerializer(serializers.Serializer):
 
     def validate_code(self, value):
         try:
-            self.confirm_record = EmailConfirmation.objects.get(code=value)
+            self.confirm_record = EmailConfirmation.objects.select_related(
+                'user').get(code=value)
         except EmailConfirmation.DoesNotExist:
             raise serializers.ValidationError("Invalid confirmation code.")
         return value
@@ -213,11 +277,25 @@ class EmailConfirmationSerializer(serializers.Serializer):
     def create(self, validated_data):
         user = self.confirm_record.user
         user.is_confirmed = True
-        user.save()
-        user.email_confirmations.all().delete()
+        user.save(update_fields=['is_confirmed'])
+        EmailConfirmation.objects.filter(user=user).delete()
         return user
 
 
+def _get_google_users(email, google_id):
+    """
+    Returns the (email_user, google_user) pair matching a Google identity,
+    fetched with a single query.
+    """
+    candidates = list(User.objects.filter(
+        Q(email__iexact=email) | Q(google_id=google_id)))
+    email_user = next(
+        (u for u in candidates if u.email.lower() == email.lower()), None)
+    google_user = next(
+        (u for u in candidates if u.google_id == google_id), None)
+    return email_user, google_user
+
+
 class GoogleLoginDeserializer(serializers.Serializer):
 
     credential = serializers.CharField()
@@ -226,10 +304,7 @@ class GoogleLoginDeserializer(serializers.Serializer):
         if not settings.GOOGLE_CLIENT_ID:
             raise serializers.ValidationError("Google login is unavailable.")
         try:
-            idinfo = id_token.verify_oauth2_token(
-                value,
-                gauth_requests.Request(),
-                settings.GOOGLE_CLIENT_ID)
+            idinfo = self.verify_credential(value)
             if idinfo['iss'] not in [
                 'accounts.google.com',
                 'https://accounts.google.com']:
@@ -248,6 +323,17 @@ class GoogleLoginDeserializer(serializers.Serializer):
 
         return value
 
+    def verify_credential(self, value):
+        cache_key = 'google_idinfo_%s' % _hash_token(value)
+        idinfo = cache.get(cache_key)
+        if idinfo is None:
+            idinfo = id_token.verify_oauth2_token(
+                value,
+                _GAUTH_REQUEST,
+                settings.GOOGLE_CLIENT_ID)
+            cache.set(cache_key, idinfo, GOOGLE_IDINFO_CACHE_TTL)
+        return idinfo
+
     def create(self, validated_data):
         user_info = self.user_info
         email = user_info['email']
@@ -256,52 +342,62 @@ class GoogleLoginDeserializer(serializers.Serializer):
         last_name = user_info['last_name']
 
         # First, see if we already have this e-mail address in our system
-        email_user = User.objects.filter(email__iexact=email).first()
-        google_user = User.objects.filter(google_id=google_id).first()
+        email_user, google_user = _get_google_users(email, google_id)
 
         # This is a new user, create it with no usable password
         if not email_user and not google_user:
-            user = User.objects.create(
+            user = User(
                 email=email,
                 first_name=first_name,
                 last_name=last_name,
                 google_id=google_id,
                 is_confirmed=True)
             user.set_unusable_password()
+            user.save(force_insert=True)
             return user
 
         # There is already a user with that e-mail address, but no google
         # ID associated with it. Update the user with the google ID
         # and the first and last names if they were not set.
         if email_user and not google_user:
+            update_fields = ['google_id', 'is_confirmed']
             email_user.google_id = google_id
             email_user.is_confirmed = True
             if not email_user.first_name:
                 email_user.first_name = first_name
+                update_fields.append('first_name')
             if not email_user.last_name:
                 email_user.last_name = last_name
-            email_user.save()
+                update_fields.append('last_name')
+            email_user.save(update_fields=update_fields)
             return email_user
 
         # The e-mail address on an existing google user is being updated.
         if not email_user and google_user:
+            update_fields = ['email', 'is_confirmed']
             google_user.email = email
             google_user.is_confirmed = True
             if not google_user.first_name:
                 google_user.first_name = first_name
+                update_fields.append('first_name')
             if not google_user.last_name:
                 google_user.last_name = last_name
-            google_user.save()
+                update_fields.append('last_name')
+            google_user.save(update_fields=update_fields)
             return google_user
 
         # There is one user that matches both e-mail and google ID. This is
         # a typical login scenario.
         if email_user and google_user and email_user == google_user:
+            update_fields = []
             if not email_user.first_name:
                 email_user.first_name = first_name
+                update_fields.append('first_name')
             if not email_user.last_name:
                 email_user.last_name = last_name
-            email_user.save()
+                update_fields.append('last_name')
+            if update_fields:
+                email_user.save(update_fields=update_fields)
             return email_user
 
         # The last scenario is that there are already two users, one with the
@@ -322,8 +418,7 @@ class GoogleSaveDeserializer(GoogleLoginDeserializer):
         first_name = user_info['first_name']
         last_name = user_info['last_name']
 
-        email_user = User.objects.filter(email__iexact=email).first()
-        google_user = User.objects.filter(google_id=google_id).first()
+        email_user, google_user = _get_google_users(email, google_id)
 
         if email_user and google_user and email_user != google_user:
             raise serializers.ValidationError(
@@ -342,6 +437,9 @@ class GoogleSaveDeserializer(GoogleLoginDeserializer):
         user.first_name = first_name
         user.last_name = last_name
         user.is_confirmed = True
-        user.save()
+        user.is_temporary = False
+        user.save(update_fields=[
+            'email', 'google_id', 'first_name', 'last_name', 'is_confirmed',
+            'is_temporary'])
 
         return user
@@ -1,9 +1,15 @@
 from datetime import datetime, timedelta
 from django.core.cache import cache
 from celery import shared_task
+from core import mail
 from fastapi_app.forge_ws import check_heartbeats
 
 
 @shared_task
 def cleanup_stale_connections():
     check_heartbeats()
+
+
+@shared_task
+def send_login_link(email, token):
+    mail.send_login_link(email, token)
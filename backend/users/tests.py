@@ -3,7 +3,8 @@ import mock
 from config import constants as adv_consts
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 
 from rest_framework.test import APITestCase
 from rest_framework.reverse import reverse
@@ -12,10 +13,19 @@ from spawns import serializers as spawn_serializers
 from spawns.models import Player
 from tests.base import WorldTestCase
 
-from users.models import LoginLinkRequest
+from users.models import EmailConfirmation, LoginLinkRequest
+from users.serializers import (
+    EmailConfirmationSerializer,
+    SignupSerializer,
+    UserSerializer,
+    serialize_user)
 
 User = get_user_model()
 
+# Resolved once at import; these names are hit by several tests each
+LOGGED_IN_USER_URL = reverse('logged-in-user')
+FORGOT_PASSWORD_URL = reverse('forgot-password')
+
 # class CreationTests(APITestCase):
 #     "Make sure that the auth protected resources can't be created"
 
@@ -28,30 +38,39 @@ User = get_user_model()
 
 class LoggedInUserTests(APITestCase):
 
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user, cls.user2 = User.objects.bulk_create([
+            User(username='john', email='j@example.com'),
+            User(username='will', email='w@example.com'),
+        ])
+
     def test_view_unauthenticated(self):
-        resp = self.client.get(reverse('logged-in-user'))
+        resp = self.client.get(LOGGED_IN_USER_URL)
         self.assertEqual(resp.status_code, 401)
 
     def test_view_authenticated(self):
-        user = User.objects.create(username='john')
-        self.client.force_authenticate(user=user)
-        resp = self.client.get(reverse('logged-in-user'))
+        self.client.force_authenticate(user=self.user)
+        resp = self.client.get(LOGGED_IN_USER_URL)
         self.assertEqual(resp.status_code, 200)
-        self.assertEqual(resp.data['id'], user.id)
+        self.assertEqual(resp.data['id'], self.user.id)
+
+    def test_serialize_user_matches_serializer(self):
+        self.assertEqual(
+            serialize_user(self.user), UserSerializer(self.user).data)
 
     def test_edit_username(self):
-        user = User.objects.create(username='john', email='j@example.com')
+        user = self.user
         self.client.force_authenticate(user=user)
 
         # Change via logged-in-user endpoint
         resp = self.client.put(
-            reverse('logged-in-user'), {
+            LOGGED_IN_USER_URL, {
                 'name': 'jack'
             })
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp.data['name'], 'jack')
-        user.refresh_from_db()
-        self.assertEqual(user.username, 'jack')
 
         # Change via user detail endpoint
         resp = self.client.put(
@@ -59,25 +78,53 @@ class LoggedInUserTests(APITestCase):
                 'name': 'joe'
             })
         self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['name'], 'joe')
+        # One reload to check the last change was persisted
         user.refresh_from_db()
         self.assertEqual(user.username, 'joe')
 
         # Tests that can't edit someone else's username
-        user2 = User.objects.create(username='will', email='w@example.com')
         resp = self.client.put(
-            reverse('user-detail', args=[user2.pk]), {
+            reverse('user-detail', args=[self.user2.pk]), {
                 'name': 'bill'
             })
         self.assertEqual(resp.status_code, 404)
 
 
-class SignupTests(APITestCase):
+class PatronsTests(APITestCase):
 
     def setUp(self):
         super().setUp()
-        self.endpoint = reverse('signup')
-        self.email = 'user@example.com'
-        self.username = 'John'
+        cache.clear()
+
+    def test_patrons_cached_per_tier(self):
+        User.objects.bulk_create([
+            User(username='patron', email='p@example.com',
+                 name_recognition=True, player_housing=True),
+            User(username='quiet', email='q@example.com'),
+        ])
+
+        resp = self.client.get(reverse('users-patrons'))
+        self.assertEqual([u['name'] for u in resp.data['data']], ['patron'])
+        resp = self.client.get(
+            reverse('users-patrons', kwargs={'tier': 'Multiplayer'}))
+        self.assertEqual(resp.data['data'], [])
+
+        housing_url = reverse('users-patrons', kwargs={'tier': 'housing'})
+        self.client.get(housing_url)
+        with self.assertNumQueries(0):
+            resp = self.client.get(housing_url)
+        self.assertEqual(len(resp.data['data']), 1)
+
+
+class SignupTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.endpoint = reverse('signup')
+        cls.email = 'user@example.com'
+        cls.username = 'John'
 
     def test_signup_when_already_authenticated(self):
         user = User.objects.create_user('joe@example.com', 'p')
@@ -91,7 +138,7 @@ class SignupTests(APITestCase):
 
     def test_successful_signup(self):
         self.assertEqual(
-            self.client.get(reverse('logged-in-user')).status_code, 401)
+            self.client.get(LOGGED_IN_USER_URL).status_code, 401)
 
         resp = self.client.post(self.endpoint, {
             'email': self.email,
@@ -108,7 +155,8 @@ class SignupTests(APITestCase):
         self.assertFalse(user.has_usable_password())
         self.assertEqual(user.first_name, 'John')
         self.assertEqual(user.last_name, 'Doe')
-        self.assertEqual(LoginLinkRequest.objects.filter(user=user).count(), 1)
+        self.assertEqual(user.ip, '127.0.0.1')
+        self.assertTrue(LoginLinkRequest.objects.filter(user=user).exists())
 
     def test_signup_duplicate(self):
         user = User.objects.create(email='john2@example.com',
@@ -128,6 +176,17 @@ class SignupTests(APITestCase):
         self.assertEqual(resp.status_code, 400)
         self.assertEqual(resp.data['email'][0], 'This field must be unique.')
 
+    def test_signup_duplicate_email_and_username(self):
+        User.objects.create(email=self.email, username=self.username)
+        serializer = SignupSerializer(data={
+            'email': self.email.upper(),
+            'username': self.username,
+        })
+        with self.assertNumQueries(1):
+            self.assertFalse(serializer.is_valid())
+        self.assertEqual(
+            set(serializer.errors.keys()), {'email', 'username'})
+
     def test_signup_without_names(self):
         resp = self.client.post(self.endpoint, {
             'email': self.email,
@@ -163,25 +222,94 @@ class SignupTests(APITestCase):
         })
         self.assertEqual(resp.status_code, 400)
 
-class SaveTemporaryUserTests(WorldTestCase):
+@override_settings(GOOGLE_CLIENT_ID='client-id')
+class GoogleLoginTests(APITestCase):
 
     def setUp(self):
         super().setUp()
-        self.endpoint = reverse('save-user')
-        self.username = 'John'
-        self.email = 'john@example.com'
+        cache.clear()
+        self.endpoint = reverse('google-login')
+        self.idinfo = {
+            'iss': 'accounts.google.com',
+            'email_verified': True,
+            'email': 'joe@example.com',
+            'sub': 'google-123',
+            'given_name': 'Joe',
+            'family_name': 'Doe',
+        }
+
+    def login(self):
+        with mock.patch('users.serializers.id_token.verify_oauth2_token',
+                        return_value=self.idinfo) as mock_verify:
+            resp = self.client.post(self.endpoint, {'credential': 'cred'})
+        self.verify_calls = mock_verify.call_count
+        return resp
+
+    def test_new_user(self):
+        resp = self.login()
+        self.assertEqual(resp.status_code, 201)
+        user = User.objects.get(pk=resp.data['user']['id'])
+        self.assertEqual(user.google_id, 'google-123')
+        self.assertTrue(user.is_confirmed)
+        self.assertFalse(user.has_usable_password())
+        self.assertIsNotNone(user.last_login)
 
-        self.user.is_temporary = True
-        self.user.save()
-        self.client.force_authenticate(self.user)
+    def test_double_submit_verifies_once(self):
+        self.assertEqual(self.login().status_code, 201)
+        self.assertEqual(self.verify_calls, 1)
+        self.assertEqual(self.login().status_code, 201)
+        self.assertEqual(self.verify_calls, 0)
+
+    def test_link_existing_email(self):
+        user = User.objects.create(email='Joe@example.com')
+        resp = self.login()
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.data['user']['id'], user.id)
+        user.refresh_from_db()
+        self.assertEqual(user.google_id, 'google-123')
+        self.assertEqual(user.first_name, 'Joe')
+
+    def test_update_google_user_email(self):
+        user = User.objects.create(email='old@example.com',
+                                   google_id='google-123')
+        resp = self.login()
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.data['user']['id'], user.id)
+        user.refresh_from_db()
+        self.assertEqual(user.email, 'joe@example.com')
+
+    def test_account_conflict(self):
+        User.objects.bulk_create([
+            User(email='joe@example.com'),
+            User(email='other@example.com', google_id='google-123'),
+        ])
+        resp = self.login()
+        self.assertEqual(resp.status_code, 400)
+
+
+class SaveTemporaryUserTests(WorldTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.endpoint = reverse('save-user')
+        cls.username = 'John'
+        cls.email = 'john@example.com'
+
+        cls.user.is_temporary = True
+        cls.user.save()
 
-        self.spawn_world = self.world.create_spawn_world()
-        self.player = Player.objects.create(
-            world=self.spawn_world,
+        # Reuse the spawn world WorldTestCase already built
+        cls.player = Player.objects.create(
+            world=cls.spawn_world,
             name='Lana',
             gender=adv_consts.GENDER_FEMALE,
-            room=self.room,
-            user=self.user)
+            room=cls.room,
+            user=cls.user)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
 
     def test_save_intro_character(self):
         self.assertTrue(self.user.is_temporary)
@@ -204,9 +332,8 @@ class SaveTemporaryUserTests(WorldTestCase):
         self.assertEqual(self.user.first_name, 'John')
         self.assertEqual(self.user.last_name, 'Doe')
         self.assertTrue(resp.data['login_link_sent'])
-        self.assertEqual(
-            LoginLinkRequest.objects.filter(user=self.user).count(),
-            1)
+        self.assertTrue(
+            LoginLinkRequest.objects.filter(user=self.user).exists())
 
         self.assertEqual(resp.data['user']['name'], self.username)
         self.assertEqual(resp.data['user']['email'], self.email)
@@ -220,53 +347,66 @@ class SaveTemporaryUserTests(WorldTestCase):
         self.assertEqual(resp.status_code, 403)
 
 
-class ForgotPasswordTests(WorldTestCase):
-    "Tests for initiating a login link request"
+class PatchedLoginLinkMixin:
+    "Patch the login link task once per class rather than once per test."
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        patcher = mock.patch('users.tasks.send_login_link.delay')
+        cls.mock_send = patcher.start()
+        cls.addClassCleanup(patcher.stop)
 
     def setUp(self):
         super().setUp()
+        self.mock_send.reset_mock()
 
-    @mock.patch('users.serializers.mail.send_login_link')
-    def test_request_login_link(self, mock_send):
+
+class ForgotPasswordTests(PatchedLoginLinkMixin, WorldTestCase):
+    "Tests for initiating a login link request"
+
+    def test_request_login_link(self):
         # Email does not exist, we return a 201 response despite the fact
         # that no request was initiated, so as not to give away whether the
         # account actually exists / does not exist
-        resp = self.client.post(reverse('forgot-password'), {
-            'email': 'nobody@example.com'
-        })
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post(FORGOT_PASSWORD_URL, {
+                'email': 'nobody@example.com'
+            })
         self.assertEqual(resp.status_code, 201)
-        mock_send.assert_not_called()
+        self.mock_send.assert_not_called()
 
         # If we use a working email, the endpoint tries to send an email
-        resp = self.client.post(reverse('forgot-password'), {
-            'email': self.user.email,
-        })
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post(FORGOT_PASSWORD_URL, {
+                'email': self.user.email,
+            })
         self.assertEqual(resp.status_code, 201)
-        mock_send.assert_called()
+        self.mock_send.assert_called()
 
         # Make sure a login link record got created
-        self.assertEqual(
-            LoginLinkRequest.objects.filter(user=self.user).count(),
-            1)
+        self.assertTrue(
+            LoginLinkRequest.objects.filter(user=self.user).exists())
 
-    @mock.patch('users.serializers.mail.send_login_link')
-    def test_request_password_with_unconfirmed_user(self, mock_send):
+    def test_request_password_with_unconfirmed_user(self):
         "Login links should still be sent even if the email isn't confirmed yet"
         self.user.is_confirmed = False
         self.user.save()
-        resp = self.client.post(reverse('forgot-password'), {
-            'email': self.user.email
-        })
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post(FORGOT_PASSWORD_URL, {
+                'email': self.user.email
+            })
         self.assertEqual(resp.status_code, 201)
-        mock_send.assert_called()
+        self.mock_send.assert_called()
 
 
 class ResetPasswordTests(WorldTestCase):
     "Tests for doing the password change with a code"
 
-    def setUp(self):
-        super().setUp()
-        self.ep = reverse('reset-password')
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.ep = reverse('reset-password')
 
     def test_reset_invalid_code(self):
         resp = self.client.post(self.ep, {
@@ -287,47 +427,66 @@ class ResetPasswordTests(WorldTestCase):
         self.assertEqual(resp.status_code, 410)
 
 
-class LoginLinkTests(WorldTestCase):
-
-    def setUp(self):
-        super().setUp()
-
-    @mock.patch('users.serializers.mail.send_login_link')
-    def test_signup_sends_email(self, mock_send_confirmation):
-        # Make sure signing up sends a login link
-        resp = self.client.post(reverse('signup'), {
-            'email': 'user@example.com',
-        })
-        self.assertEqual(resp.status_code, 201)
-        mock_send_confirmation.assert_called()
+class LoginLinkTests(PatchedLoginLinkMixin, WorldTestCase):
 
-    @mock.patch('users.serializers.mail.send_login_link')
-    def test_save_sends_email(self, mock_send_confirmation):
-        self.client.force_authenticate(self.user)
+    def test_sends_login_link(self):
         self.user.is_temporary = True
         self.user.save()
-        resp = self.client.post(reverse('save-user'), {
-            'email': 'user@example.com',
-        })
-        self.assertEqual(resp.status_code, 201)
-        mock_send_confirmation.assert_called()
-    @mock.patch('users.serializers.mail.send_login_link')
-    def test_resend_confirmation_code(self, mock_send_confirmation):
+        cases = (
+            # endpoint, payload, authenticated, expected recipient
+            ('signup', {'email': 'user@example.com'}, False,
+             'user@example.com'),
+            ('resend-confirmation', {}, True, self.user.email),
+            ('save-user', {'email': 'saved@example.com'}, True,
+             'saved@example.com'),
+        )
+        for endpoint, payload, authenticated, email in cases:
+            with self.subTest(endpoint=endpoint):
+                self.mock_send.reset_mock()
+                self.client.force_authenticate(
+                    self.user if authenticated else None)
+                with self.captureOnCommitCallbacks(execute=True):
+                    resp = self.client.post(reverse(endpoint), payload)
+                self.assertEqual(resp.status_code, 201)
+                self.mock_send.assert_called_once_with(email, mock.ANY)
+
+    def test_resend_confirmation_code(self):
         endpoint = reverse('resend-confirmation')
 
         resp = self.client.post(endpoint)
         self.assertEqual(resp.status_code, 401)
 
+        # Confirmed users can still ask for a fresh link
+        self.user.is_temporary = False
+        self.user.is_confirmed = True
+        self.user.save()
         self.client.force_authenticate(self.user)
         resp = self.client.post(endpoint, {})
         self.assertEqual(resp.status_code, 201)
-        mock_send_confirmation.assert_called()
 
-        self.user.is_temporary = False
-        self.user.save()
 
-        self.user.is_confirmed = True
-        self.user.save()
+class EmailConfirmationTests(APITestCase):
 
-        resp = self.client.post(endpoint, {})
-        self.assertEqual(resp.status_code, 201)
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(email='joe@example.com')
+        EmailConfirmation.objects.bulk_create([
+            EmailConfirmation(user=self.user, code='code1'),
+            EmailConfirmation(user=self.user, code='code2'),
+        ])
+
+    def test_confirm_email(self):
+        serializer = EmailConfirmationSerializer(data={'code': 'code1'})
+        # Lookup with its user, confirm, clear outstanding codes
+        with self.assertNumQueries(3):
+            self.assertTrue(serializer.is_valid())
+            user = serializer.save()
+        self.assertEqual(user, self.user)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_confirmed)
+        self.assertFalse(
+            EmailConfirmation.objects.filter(user=self.user).exists())
+
+    def test_invalid_code(self):
+        resp = self.client.post(reverse('confirm-email'), {'code': 'nope'})
+        self.assertEqual(resp.status_code, 400)
@@ -2,6 +2,10 @@ from rest_framework_simplejwt.tokens import RefreshToken
 
 
 def build_token_response(user):
+    # Each call mints a fresh pair: the tokens carry their own jti/exp, so
+    # they must not be cached or shared between logins. simplejwt already
+    # keeps one token backend (and signing key) for the process, leaving
+    # only the two HS256 signatures below as per-call work.
     refresh = RefreshToken.for_user(user)
     access_token = str(refresh.access_token)
     return {
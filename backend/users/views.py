@@ -1,10 +1,12 @@
 import logging
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.utils import timezone
 
 from rest_framework import (
     permissions,
+    serializers,
     status,
     viewsets)
 from rest_framework.views import APIView
@@ -69,15 +71,26 @@ class PatronsView(APIView):
     permission_classes = ()
 
     def get(self, request, tier=None, format=None):
+        tier = tier.lower() if tier else ''
+        if tier not in ('housing', 'multiplayer'):
+            tier = 'all'
+
+        # The patron list is public and changes rarely, so serve it from
+        # the cache for a few minutes rather than re-serializing every user.
+        cache_key = 'patrons_%s' % tier
+        data = cache.get(cache_key)
+        if data is not None:
+            return Response({'data': data})
+
         qs = User.objects.filter(name_recognition=True)
-        if tier and tier.lower() == 'housing':
+        if tier == 'housing':
             qs = qs.filter(player_housing=True)
-        if tier and tier.lower() == 'multiplayer':
+        if tier == 'multiplayer':
             qs = qs.filter(multiplayer_worlds=True)
 
-        return Response({
-            'data': user_serializers.UserSerializer(qs, many=True).data
-        })
+        data = user_serializers.UserSerializer(qs, many=True).data
+        cache.set(cache_key, data, 300)
+        return Response({'data': data})
 
 patrons = PatronsView.as_view()
 
@@ -111,7 +124,7 @@ class ConfirmLoginLink(APIView):
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
         response_data = build_token_response(user)
-        response_data['user'] = user_serializers.UserSerializer(user).data
+        response_data['user'] = user_serializers.serialize_user(user)
         return Response(response_data, status=status.HTTP_201_CREATED)
 
 
@@ -134,15 +147,12 @@ class Signup(APIView):
 
         serializer = user_serializers.SignupSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = serializer.save()
-
         ip = get_ip(request)
-        user.ip = ip
-        user.save()
+        user = serializer.save(ip=ip)
 
         security_logger.info("New user %s signed up from IP %s" % (user.email, ip))
 
-        user_data = user_serializers.UserSerializer(user).data
+        user_data = user_serializers.serialize_user(user)
         return Response({
             'user': user_data,
             'login_link_sent': True,
@@ -161,8 +171,8 @@ class GoogleLogin(APIView):
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
         user.last_login = timezone.now()
-        user.save()
-        user_data = user_serializers.UserSerializer(user).data
+        user.save(update_fields=['last_login'])
+        user_data = user_serializers.serialize_user(user)
         response_data = build_token_response(user)
         return Response({
             **response_data,
@@ -183,7 +193,7 @@ class Save(APIView):
         serializer.is_valid(raise_exception=True)
         user = serializer.save(user=request.user)
 
-        user_data = user_serializers.UserSerializer(user).data
+        user_data = user_serializers.serialize_user(user)
         response_data = build_token_response(user)
         return Response({
             **response_data,
@@ -208,13 +218,10 @@ class GoogleSave(APIView):
         serializer.is_valid(raise_exception=True)
         user = serializer.save(user=request.user)
 
-        user.is_temporary = False
-        user.save()
-
         player.user = user
         player.save(update_fields=['user'])
 
-        user_data = user_serializers.UserSerializer(user).data
+        user_data = user_serializers.serialize_user(user)
         response_data = build_token_response(user)
         return Response({
             **response_data,
@@ -266,7 +273,7 @@ class EmailConfirmationView(APIView):
             data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
-        user_data = user_serializers.UserSerializer(user).data
+        user_data = user_serializers.serialize_user(user)
         if not request.user.is_authenticated:
             token_data = build_token_response(user)
         else:
@@ -287,7 +294,6 @@ class ResendConfirmationView(APIView):
     throttle_classes = (EmailThrottle,)
 
     def post(self, request, format=None):
-        from rest_framework import serializers
         if request.user.is_invalid:
             raise serializers.ValidationError("Invalid e-mail address.")
 
@@ -310,7 +316,7 @@ class AcceptCodeOfConduct(APIView):
         user = request.user
         user.cod_accepted = True
         user.save()
-        user_data = user_serializers.UserSerializer(user).data
+        user_data = user_serializers.serialize_user(user)
         return Response(user_data, status=status.HTTP_201_CREATED)
 
 accept_cod = AcceptCodeOfConduct.as_view()
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db.models import Count, Prefetch
 
 from core.admin import BaseAdmin, DirectRootWorldFilter
 from worlds.models import (
@@ -48,14 +49,25 @@ class WorldAdmin(BaseAdmin):
     display_as_choicefield = ['lifecycle']
     exclude = ['full_map']
     search_fields = ['id', 'name']
+    list_select_related = ['context']
+
+    def get_queryset(self, request):
+        # for_player reads world.players for every row
+        return super().get_queryset(request).prefetch_related('players')
 
 
 def num_worlds(config):
-    return config.configured_worlds.count()
+    return config.num_worlds
 num_worlds.short_description = 'Number of Worlds'
+num_worlds.admin_order_field = 'num_worlds'
 
 def root_world(config):
-    world = config.configured_worlds.first()
+    # configured_worlds is prefetched in the default World ordering, so
+    # the first entry matches what .first() would have returned.
+    worlds = config.configured_worlds.all()
+    if not worlds:
+        return None
+    world = worlds[0]
     return world.context if world.context else world
 root_world.short_description = 'Root World'
 
@@ -66,6 +78,13 @@ class WorldConfigAdmin(BaseAdmin):
     display_as_choicefield = ['death_mode']
     search_fields = ['configured_worlds__name']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            num_worlds=Count('configured_worlds')
+        ).prefetch_related(Prefetch(
+            'configured_worlds',
+            queryset=World.objects.select_related('context')))
+
 
 class ZoneAdmin(BaseAdmin):
 
@@ -1,10 +1,33 @@
-from config import constants as adv_consts
+from django.db import models, transaction
 
-from django.db import models
+from config import constants as adv_consts
 
 
 class WorldManager(models.Manager):
 
+    # Large text columns that code iterating over worlds rarely reads
+    LEAN_DEFERRED_FIELDS = (
+        'full_map', 'facts', 'motd', 'description', 'maintenance_msg')
+
+    def lean(self):
+        """
+        Worlds without their large text columns, for lists and background
+        jobs that only look at state. Deferred fields still load on access.
+        """
+        return self.get_queryset().defer(*self.LEAN_DEFERRED_FIELDS)
+
+    def with_hierarchy(self):
+        """
+        Join in the worlds that config_source_world, effective_config and
+        nexus_name walk through, so reading them on each world of a list
+        does not cost extra queries.
+        """
+        return self.get_queryset().select_related(
+            'config',
+            'instance_of',
+            'context__config',
+            'context__instance_of')
+
     def new_world(self, *args, **kwargs):
         """
         Essentially creates a new template world with a zone, room, config
@@ -15,58 +38,81 @@ class WorldManager(models.Manager):
         from worlds.models import Room, Zone, WorldConfig
 
         provided_config = kwargs.pop("config", None)
-        world = super().create(**kwargs)
-        zone = Zone.objects.create(name='Starting Zone', world=world)
-        room = Room.objects.create(
-            name='Starting Room',
-            world=world,
-            zone=zone,
-            x=0, y=0, z=0)
-
-        if provided_config is not None:
-            config = provided_config
-            config_update_fields = []
-            if not config.starting_room_id:
-                config.starting_room = room
-                config_update_fields.append("starting_room")
-            if not config.death_room_id:
-                config.death_room = room
-                config_update_fields.append("death_room")
-            if config_update_fields:
-                config.save(update_fields=config_update_fields)
-        else:
-            config = WorldConfig.objects.create(
-                starting_room=room,
-                death_room=room,
-            )
-
-        world.config = config
-        world.save(update_fields=["config"])
+        # Five dependent writes; commit them together so a failure part way
+        # through does not leave a world without its starting room/config.
+        with transaction.atomic():
+            world = super().create(**kwargs)
+            zone = Zone.objects.create(name='Starting Zone', world=world)
+            room = Room.objects.create(
+                name='Starting Room',
+                world=world,
+                zone=zone,
+                x=0, y=0, z=0)
+
+            if provided_config is not None:
+                config = provided_config
+                config_update_fields = []
+                if not config.starting_room_id:
+                    config.starting_room = room
+                    config_update_fields.append("starting_room")
+                if not config.death_room_id:
+                    config.death_room = room
+                    config_update_fields.append("death_room")
+                if config_update_fields:
+                    config.save(update_fields=config_update_fields)
+            else:
+                config = WorldConfig.objects.create(
+                    starting_room=room,
+                    death_room=room,
+                )
+
+            # World has no save hooks, so skip the model save machinery.
+            self.filter(pk=world.pk).update(config=config)
+            world.config = config
         return world
 
 
 class RoomManager(models.Manager):
 
     def get_map(self, room, radius=5):
-        dimensions = adv_consts.MAP_DIMENSIONS
+        # Bounding box around the room. The (world, x, y, z) unique
+        # constraint on Room provides the index this range scan uses.
         return self.get_queryset().filter(
-            world=room.world,
-            x__gte=room.x - radius,
-            x__lte=room.x + radius,
-            y__gte=room.y - radius,
-            y__lte=room.y + radius,
-            z__gte=room.z - radius,
-            z__lte=room.z + radius)
+            world_id=room.world_id,
+            x__range=(room.x - radius, room.x + radius),
+            y__range=(room.y - radius, room.y + radius),
+            z__range=(room.z - radius, room.z + radius))
+
+    def prefetch_builder(self, qs):
+        """
+        Rooms for builder serialization, with their zone, details and flags
+        loaded up front rather than once per room.
+        """
+        return qs.select_related('zone').prefetch_related('details', 'flags')
 
     def prefetch_map(self, qs):
-        return qs.prefetch_related(
-            'north',
-            'east',
-            'west',
-            'south',
-            'up',
-            'down',
-            'zone',
-            'world',
-            'flags',
-        )
+        """
+        Load rooms for map serialization. Exits leading to rooms within qs
+        are resolved from the rows already loaded, so only exits leaving
+        the set cost a query.
+        """
+        rooms = list(qs.select_related('zone').prefetch_related('flags'))
+        rooms_by_id = {room.id: room for room in rooms}
+
+        outside_ids = set()
+        for room in rooms:
+            for direction in adv_consts.DIRECTIONS:
+                exit_id = getattr(room, direction + '_id')
+                if exit_id and exit_id not in rooms_by_id:
+                    outside_ids.add(exit_id)
+        if outside_ids:
+            rooms_by_id.update(
+                (room.id, room) for room in self.get_queryset().filter(
+                    id__in=outside_ids).only('id', 'world_id', 'name'))
+
+        for room in rooms:
+            for direction in adv_consts.DIRECTIONS:
+                exit_id = getattr(room, direction + '_id')
+                if exit_id:
+                    setattr(room, direction, rooms_by_id[exit_id])
+        return rooms
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worlds', '0090_state_only_worldconfig_starting_eq'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='world',
+            index=models.Index(condition=models.Q(('is_multiplayer', True)), fields=['nexus', '-change_state_ts'], name='worlds_world_nexus_mp_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worlds', '0091_world_worlds_world_nexus_mp_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['world', '-created_ts'], name='worlds_room_world_created_idx'),
+        ),
+    ]
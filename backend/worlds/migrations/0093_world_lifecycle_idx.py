@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worlds', '0092_room_world_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='world',
+            index=models.Index(condition=models.Q(('context__isnull', False)), fields=['lifecycle', 'lifecycle_change_ts'], name='worlds_world_lifecycle_idx'),
+        ),
+    ]
@@ -1,4 +1,7 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
+from functools import cached_property
 import json
 import logging
 import traceback
@@ -7,7 +10,7 @@ import uuid
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericRelation
 from django.contrib.contenttypes.models import ContentType
-from django.db import models, transaction
+from django.db import IntegrityError, models, transaction
 from django.db.models import Q
 from django.utils import timezone
 
@@ -131,6 +134,18 @@ class World(AdventBaseModel):
 
     class Meta:
         ordering = ('-created_ts',)
+        indexes = [
+            # Staff nexus listing of multiplayer worlds
+            models.Index(
+                fields=['nexus', '-change_state_ts'],
+                condition=Q(is_multiplayer=True),
+                name='worlds_world_nexus_mp_idx'),
+            # monitor_worlds: spawn worlds by lifecycle and time in it
+            models.Index(
+                fields=['lifecycle', 'lifecycle_change_ts'],
+                condition=Q(context__isnull=False),
+                name='worlds_world_lifecycle_idx'),
+        ]
 
     def __str__(self):
         return "%s - %s" % (self.id, self.name)
@@ -158,49 +173,48 @@ class World(AdventBaseModel):
         if not self.context:
             raise RuntimeError("Root worlds are stateless.")
 
-        with transaction.atomic():
-            world = World.objects.select_for_update().get(pk=self.pk)
-            world.lifecycle = state
-            world.change_state_ts = timezone.now()
-            world.save()
-
-        # Refresh the current instance from the database
-        self.refresh_from_db()
+        # Single UPDATE rather than lock / save / refresh
+        now = timezone.now()
+        World.objects.filter(pk=self.pk).update(
+            lifecycle=state, change_state_ts=now, modified_ts=now)
+        self.lifecycle = state
+        self.change_state_ts = now
+        self.modified_ts = now
 
         rdb = rdb or self.rdb
-        world.update_builder_admin(rdb=rdb)
-        return world
+        self.update_builder_admin(rdb=rdb)
+        return self
 
     def set_lifecycle(self, lifecycle):
         "Function that should be invoked whenever there's a lifecycle transition."
         if not self.context:
             raise RuntimeError("Root worlds have no lifecycle.")
 
-        with transaction.atomic():
-            world = World.objects.select_for_update().get(pk=self.pk)
-            world.lifecycle = lifecycle
-            world.lifecycle_change_ts = timezone.now()
-            world.save()
-
-        # Refresh the current instance from the database
-        self.refresh_from_db()
+        now = timezone.now()
+        World.objects.filter(pk=self.pk).update(
+            lifecycle=lifecycle, lifecycle_change_ts=now, modified_ts=now)
+        self.lifecycle = lifecycle
+        self.lifecycle_change_ts = now
+        self.modified_ts = now
 
-        #world.update_builder_admin()
-        return world
+        #self.update_builder_admin()
+        return self
 
     def save_data(self, game_world=None):
 
         if not self.context:
             raise RuntimeError("Can only save spawn worlds.")
 
-        try:
-            with transaction.atomic():
-                world = World.objects.select_for_update().get(pk=self.pk)
-                if world.save_start_ts:
-                    return
-                world.save_start_ts = timezone.now()
-                world.save(update_fields=['save_start_ts'])
+        # Claim the save with a conditional UPDATE; if another save already
+        # holds it, leave its marker alone.
+        claimed = World.objects.filter(
+            pk=self.pk,
+            save_start_ts__isnull=True,
+        ).update(save_start_ts=timezone.now())
+        if not claimed:
+            return
 
+        try:
             # Facts
             facts = game_world.facts or {}
             fact_schedules = self.context.fact_schedules.filter(
@@ -228,10 +242,7 @@ class World(AdventBaseModel):
             game_world.facts = facts
 
         finally:
-            with transaction.atomic():
-                world = World.objects.select_for_update().get(pk=self.pk)
-                world.save_start_ts = None
-                world.save(update_fields=['save_start_ts'])
+            World.objects.filter(pk=self.pk).update(save_start_ts=None)
 
     def track_event(self, type, start):
         # TrackedEvent.objects.create(
@@ -269,18 +280,17 @@ class World(AdventBaseModel):
 
         mobs_qs = self.mobs.filter(is_pending_deletion=True) if spw else self.mobs.all()
         destroy_reason = "world_stop" if self.lifecycle == api_consts.WORLD_STATE_STOPPED else "world_cleanup"
+        # key is a property derived from id, not a column. Stream the rows
+        # so a large world isn't held in memory all at once.
         for mob in mobs_qs.select_related("room", "world").only(
             "id",
-            "key",
             "name",
             "template_id",
             "room_id",
             "world_id",
             "room__id",
-            "room__key",
             "world__id",
-            "world__key",
-        ):
+        ).iterator(chunk_size=1000):
             maybe_enqueue_ai_sidecar_mob_destroyed(
                 mob=mob,
                 source="world.cleanup",
@@ -295,22 +305,18 @@ class World(AdventBaseModel):
             is_persistent=True,
             container_type__model='room')
 
-        if not spw:
-            # Remove all items in rooms
-            lifecycle_logger.debug("Deleting items in rooms...")
-            batch_deletion(items_qs.filter(container_type__model='room'))
-
-        # Remove all pending deletion items older than 1 month
-        lifecycle_logger.debug("Deleting items pending deletion...")
-        #batch_deletion(items_qs.filter(is_pending_deletion=True))
+        # Items are deleted in a single pass over the world's items:
+        # * pending deletion items older than 1 week
+        # * items that don't have a container
+        # * for a full cleanup, all items in rooms
         one_week_ago = timezone.now() - timezone.timedelta(days=7)
-        batch_deletion(items_qs.filter(
-            is_pending_deletion=True,
-            pending_deletion_ts__lt=one_week_ago))
-
-        # Remove all items that don't have a container
-        lifecycle_logger.debug("Deleting items that don't have a container...")
-        batch_deletion(items_qs.filter(container_id__isnull=True))
+        items_filter = (
+            Q(is_pending_deletion=True, pending_deletion_ts__lt=one_week_ago)
+            | Q(container_id__isnull=True))
+        if not spw:
+            items_filter |= Q(container_type__model='room')
+        lifecycle_logger.debug("Deleting items...")
+        batch_deletion(items_qs.filter(items_filter))
 
         # Remove all player extraction data entries older than 1 week old
         from spawns.models import PlayerData
@@ -321,18 +327,19 @@ class World(AdventBaseModel):
 
         # If instance, move all players back to the base world
         if self.context.instance_of:
-            for player in self.players.all():
-                self.leave_instance(player=player)
+            self.bulk_leave_instance()
 
-        self.players.update(in_game=False)
+        # Only touch rows that need it; most players are already out
+        self.players.filter(in_game=True).update(in_game=False)
 
         # Delete all pending deletion players
         self.players.filter(pending_deletion_ts__isnull=False).delete()
 
+        # Mark the world clean and release the cleanup lock together
+        with transaction.atomic():
+            World.objects.filter(pk=self.pk).update(is_clean=True)
+            WorldLocks.end_cleanup(self)
         self.is_clean = True
-        self.save(update_fields=['is_clean'])
-
-        WorldLocks.end_cleanup(self)
         lifecycle_logger.info("Full cleanup complete for %s (%s)" % (self.name, self.id))
 
     mpw_cleanup = cleanup
@@ -411,9 +418,9 @@ class World(AdventBaseModel):
 
     @property
     def cluster_id(self):
-        return self.context.id if self.context else self.id
+        return self.context_id or self.id
 
-    @property
+    @cached_property
     def nexus_name(self):
         root_world = self.context if self.context else self
         root_world = root_world.instance_of or root_world
@@ -515,19 +522,19 @@ class World(AdventBaseModel):
         # SPW data from the game side.
         #
         # Get all mobs that are pending deletion for the world
-        mob_ids = Mob.objects.filter(
+        mob_ids = list(Mob.objects.filter(
             is_pending_deletion=True,
-            world=self).values_list('id', flat=True)
+            world=self).values_list('id', flat=True))
         if mob_ids:
             # Mark all of the contents of pending deletion mobs as pending
             # deletion.
-            stale_items_qs = Item.objects.filter(
+            num_stale_items = Item.objects.filter(
                 container_type=ContentType.objects.get_for_model(Mob),
-                container_id__in=mob_ids)
-            if stale_items_qs:
+                container_id__in=mob_ids,
+            ).update(is_pending_deletion=True)
+            if num_stale_items:
                 print("@@@@@ Marking %s items as pending deletion"
-                      % stale_items_qs.count())
-                stale_items_qs.update(is_pending_deletion=True)
+                      % num_stale_items)
 
         if not self.last_loader_run_ts:
             from spawns.loading import run_loaders
@@ -578,19 +585,8 @@ class World(AdventBaseModel):
             if not ref_instance:
                 raise RuntimeError("Invalid instance reference %s" % ref)
 
-            player_assignment = InstanceAssignment.objects.filter(
-                instance=ref_instance,
-                player=player).first()
-            if not player_assignment:
-                player_assignment = InstanceAssignment.objects.create(
-                    instance=ref_instance,
-                    player=player,
-                    transfer_from=transfer_from)
-
-            if member_ids and not player_assignment.member_ids:
-                player_assignment.member_ids = ' '.join(member_ids)
-                player_assignment.save(update_fields=['member_ids'])
-
+            _get_or_update_assignment(
+                ref_instance, player, transfer_from, member_ids)
             return ref_instance
 
         # No instance ref is passed, we either fetch or create an instance
@@ -598,21 +594,8 @@ class World(AdventBaseModel):
         # if need be).
         instance = self.spawned_worlds.filter(leader=player).first()
         if instance:
-            player_assignment = InstanceAssignment.objects.filter(
-                instance=instance,
-                player=player).first()
-            if not player_assignment:
-                player_assignment = InstanceAssignment.objects.create(
-                    instance=instance,
-                    player=player,
-                    transfer_from=transfer_from,
-                    member_ids=' '.join(member_ids or []),
-                )
-
-            if member_ids and not player_assignment.member_ids:
-                player_assignment.member_ids = ' '.join(member_ids)
-                player_assignment.save(update_fields=['member_ids'])
-
+            _get_or_update_assignment(
+                instance, player, transfer_from, member_ids)
             return instance
 
         instance = self.create_spawn_world(
@@ -673,7 +656,11 @@ class World(AdventBaseModel):
     def leave_instance(cls, player):
         # Leave instance means that the player is going back to the main
         # world, for example after invoking the 'leave' command.
-        base_world_context = player.world.context.instance_of
+        # Load the instance up to the base world's starting room in one go
+        instance = World.objects.select_related(
+            'context__instance_of__config__starting_room',
+        ).get(pk=player.world_id)
+        base_world_context = instance.context.instance_of
         if not base_world_context:
             raise ValueError("Player is not in an instance.")
 
@@ -682,9 +669,9 @@ class World(AdventBaseModel):
 
         room = None
         try:
-            instance_assignment = InstanceAssignment.objects.get(
-                player=player,
-                instance=player.world)
+            instance_assignment = InstanceAssignment.objects.select_related(
+                'transfer_from',
+            ).get(player=player, instance=instance)
             room = instance_assignment.transfer_from
         except InstanceAssignment.DoesNotExist:
             pass
@@ -698,19 +685,72 @@ class World(AdventBaseModel):
 
         # If leaving an instance, make sure that all items in the
         # player's inventory or equipment are set to the base world.
-        inv_ids = list(player.inventory.values_list('id', flat=True))
-        eq_ids = list(player.equipment.inventory.values_list('id', flat=True))
-        from spawns.models import Item
+        # Both are gathered in one id subquery, so each UPDATE is a single
+        # statement with a single IN.
+        from spawns.models import Equipment, Item, Player
+        cts = ContentType.objects.get_for_models(Player, Equipment, Item)
+        carried_filter = Q(container_type=cts[Player], container_id=player.id)
+        if player.equipment_id:
+            carried_filter |= Q(container_type=cts[Equipment],
+                                container_id=player.equipment_id)
+        carried_ids = Item.objects.filter(carried_filter).values('id')
         Item.objects.filter(
-            Q(id__in=inv_ids) | Q(id__in=eq_ids)
+            id__in=carried_ids,
         ).update(world_id=base_spawn_world.id)
         Item.objects.filter(
-            container_type=ContentType.objects.get_for_model(Item),
-            container_id__in=inv_ids + eq_ids
+            container_type=cts[Item],
+            container_id__in=carried_ids,
         ).update(world_id=base_spawn_world.id)
 
         return player
 
+    def bulk_leave_instance(self):
+        """
+        Send every player in this instance back to the base world, the way
+        leave_instance does for a single player, with a fixed number of
+        queries regardless of how many players there are.
+        """
+        base_world_context = self.context.instance_of
+        if not base_world_context:
+            raise ValueError("World is not an instance.")
+
+        player_ids = list(self.players.values_list('id', flat=True))
+        if not player_ids:
+            return
+
+        base_spawn_world = base_world_context.spawned_worlds.filter(
+            is_multiplayer=True).get()
+
+        # Players go back to the room they entered from, or the base
+        # world's starting room.
+        transfer_from_ids = dict(InstanceAssignment.objects.filter(
+            instance=self,
+            player_id__in=player_ids,
+        ).values_list('player_id', 'transfer_from_id'))
+        starting_room_id = base_world_context.config.starting_room_id
+        ids_by_room = {}
+        for player_id in player_ids:
+            room_id = transfer_from_ids.get(player_id) or starting_room_id
+            ids_by_room.setdefault(room_id, []).append(player_id)
+
+        from spawns.models import Equipment, Item, Player
+        cts = ContentType.objects.get_for_models(Player, Equipment, Item)
+        for room_id, ids in ids_by_room.items():
+            Player.objects.filter(id__in=ids).update(
+                world_id=base_spawn_world.id, room_id=room_id)
+
+        # Items in their inventories or equipment, and what those contain
+        carried_ids = Item.objects.filter(
+            Q(container_type=cts[Player], container_id__in=player_ids)
+            | Q(container_type=cts[Equipment],
+                container_id__in=Player.objects.filter(
+                    id__in=player_ids).values('equipment_id'))
+        ).values('id')
+        Item.objects.filter(
+            Q(id__in=carried_ids)
+            | Q(container_type=cts[Item], container_id__in=carried_ids)
+        ).update(world_id=base_spawn_world.id)
+
     def exit_instance(self, player):
         template_world = self.context
         if not template_world:
@@ -738,15 +778,16 @@ class World(AdventBaseModel):
 
         # See if any players are left on this instance, and if not
         # clean it up.
-        if not spawned_instance.players.count():
+        if not spawned_instance.players.exists():
             game_db = spawned_instance.rdb
 
             if game_db.exists(spawned_instance.key):
                 game_db.fetch(spawned_instance.key).delete()
             spawned_instance.delete()
 
-    @property
+    @cached_property
     def factions(self):
+        # Honors a prefetch_related('world_factions') on the template world
         factions = {}
         template_world = self.context or self
         for faction in template_world.world_factions.all():
@@ -780,8 +821,9 @@ class World(AdventBaseModel):
         return data
 
     def get_running_worlds(self, rdb=None):
-        return self.spawned_worlds.filter(
-            lifecycle=api_consts.WORLD_STATE_RUNNING)
+        return self.spawned_worlds.with_hierarchy().defer(
+            *WorldManager.LEAN_DEFERRED_FIELDS,
+        ).filter(lifecycle=api_consts.WORLD_STATE_RUNNING)
 
     # Model creators
 
@@ -806,6 +848,8 @@ class World(AdventBaseModel):
 
         rooms = {}
         room_refs = {}
+        # One field instance serves every room and zone reference
+        reference_field = ReferenceField()
 
         # After this block, rooms looks like
         # { 2340: {'id': 2340,
@@ -822,26 +866,41 @@ class World(AdventBaseModel):
         #          'up_id': None,
         #          'down_id': None,
         #          'zone_id': 76}}
-        rooms_qs = rooms_qs or self.rooms.all()
-        for room in rooms_qs:
-            rooms[room.id] = room.data
-            rooms[room.id]['flags'] = []
-            room_refs[room.id] = ReferenceField().to_representation(room)
+        if rooms_qs is None:
+            rooms_qs = self.rooms.all()
+        # Stream plain rows rather than building Room instances; key and
+        # model_type are filled in the same way Room.data does.
+        model_type = Room.get_class_name()
+        for room_data in rooms_qs.values(
+                'id', 'name', 'type', 'note', 'description',
+                'x', 'y', 'z', 'color', 'north_id', 'east_id', 'south_id',
+                'west_id', 'up_id', 'down_id', 'zone_id',
+        ).iterator(chunk_size=2000):
+            room_id = room_data['id']
+            room_data['key'] = '%s.%s' % (model_type, room_id)
+            room_data['model_type'] = model_type
+            room_data['flags'] = []
+            rooms[room_id] = room_data
+            room_refs[room_id] = {
+                'model_type': model_type,
+                'key': room_data['key'],
+                'name': room_data['name'],
+                'id': room_id,
+            }
 
         # Gather room flags
         flags_qs = RoomFlag.objects.filter(
-            room__world_id=self.id)
+            room__world_id=self.id).values_list('room_id', 'code')
 
         # Add room flags to rooms
-        for flag in flags_qs:
-            #print(rooms[flag_room_id])
-            rooms[flag.room_id]['flags'].append(flag.code)
+        for room_id, code in flags_qs:
+            rooms[room_id]['flags'].append(code)
 
         # Gather zones
-        zones_qs = self.zones.all()
-        zone_refs = {}
-        for zone in zones_qs:
-            zone_refs[zone.id] = ReferenceField().to_representation(zone)
+        zones_qs = self.zones.only('id', 'world_id', 'name')
+        zone_refs = {
+            zone.id: reference_field.to_representation(zone)
+            for zone in zones_qs}
 
         # now go through all the rooms again and add the directions + zone
         # references
@@ -869,6 +928,31 @@ class World(AdventBaseModel):
         return rooms_by_key
 
 
+def _get_or_update_assignment(instance, player, transfer_from, member_ids):
+    """
+    Make sure a player has an assignment to an instance, recording the
+    group member ids on it if it doesn't have any yet.
+    """
+    member_ids = ' '.join(member_ids or [])
+    # No unique constraint on (instance, player), so tolerate duplicates
+    # rather than using get_or_create.
+    assignment = InstanceAssignment.objects.filter(
+        instance=instance,
+        player=player).first()
+    if not assignment:
+        return InstanceAssignment.objects.create(
+            instance=instance,
+            player=player,
+            transfer_from=transfer_from,
+            member_ids=member_ids)
+
+    if member_ids and not assignment.member_ids:
+        InstanceAssignment.objects.filter(pk=assignment.pk).update(
+            member_ids=member_ids)
+        assignment.member_ids = member_ids
+    return assignment
+
+
 class InstanceAssignment(BaseModel):
     player = models.ForeignKey('spawns.Player',
                                related_name='player_instances',
@@ -899,39 +983,39 @@ class WorldLocks(BaseModel):
     @classmethod
     def check_ongoing_cleanup(cls, world):
         "If a world is currently being cleaned up, return the timestamp. Otherwise None."
-        with transaction.atomic():
-            try:
-                lock = cls.objects.select_for_update().get(world=world)
-            except WorldLocks.DoesNotExist:
-                return None
-            return lock.clean_start_ts
+        # A plain read: locking here only made start preflights queue up
+        # behind start_cleanup/end_cleanup, and the answer can change as
+        # soon as the lock would be released anyway.
+        return cls.objects.filter(world=world).values_list(
+            'clean_start_ts', flat=True).first()
 
     @classmethod
     def start_cleanup(cls, world):
         if not world.context:
             raise TypeError("Cannot lock root world.")
         with transaction.atomic():
-            # Lock the row for the duration of the transaction
-            try:
-                lock = cls.objects.select_for_update().get(world=world)
-            except WorldLocks.DoesNotExist:
-                lock = cls.objects.create(world=world)
-                lock = cls.objects.select_for_update().get(world=world)
+            # Lock the row for the duration of the transaction. A row we
+            # create is ours until commit, and world is unique, so a
+            # concurrent creator falls back to waiting on our lock.
+            lock, _ = cls.objects.select_for_update().get_or_create(
+                world=world)
             if lock.clean_start_ts is not None:
                 raise Exception("Cleanup is already in progress from %s" % lock.clean_start_ts)
             lock.clean_start_ts = timezone.now()
-            lock.save()
+            lock.save(update_fields=['clean_start_ts', 'modified_ts'])
+            # Mirrored on the world so start preflights can skip the lock
+            # lookup when no cleanup is running.
+            World.objects.filter(pk=world.pk).update(
+                clean_start_ts=lock.clean_start_ts)
+            world.clean_start_ts = lock.clean_start_ts
 
     @classmethod
     def end_cleanup(cls, world):
-        with transaction.atomic():
-            # Lock the row for the duration of the transaction
-            try:
-                lock = cls.objects.select_for_update().get(world=world)
-            except WorldLocks.DoesNotExist:
-                return
-            lock.clean_start_ts = None
-            lock.save()
+        # The UPDATE takes the row lock itself; a missing lock row is a no-op
+        cls.objects.filter(world=world).update(
+            clean_start_ts=None, modified_ts=timezone.now())
+        World.objects.filter(pk=world.pk).update(clean_start_ts=None)
+        world.clean_start_ts = None
 
 
 class WorldURL(models.Model):
@@ -1063,15 +1147,11 @@ class Zone(AdventWorldBaseModel):
 
     @property
     def key(self):
-        return '%s.%s' % (
-            CamelCase__to__camel_case(self.__class__.__name__),
-            self.id)
+        model = CamelCase__to__camel_case(self.__class__.__name__)
+        return f'{model}.{self.id}'
 
     def get_game_key(self, spawn_world):
-        return '@{world_id}:{model}.{relative_id}'.format(
-            world_id=spawn_world.pk,
-            model=self.get_class_name(),
-            relative_id=self.id)
+        return f'@{spawn_world.pk}:{self.get_class_name()}.{self.id}'
 
     def update_live_instances(self):
         return
@@ -1175,39 +1255,51 @@ class Room(AdventWorldBaseModel):
                                  **optional)
 
     class Meta:
+        # (world, x, y, z) also serves get_neighbor's coordinate lookup,
+        # and each exit's one-to-one unique index serves
+        # get_inbound_exit_room.
         unique_together = [
             AdventWorldBaseModel.Meta.unique_together,
             ['world', 'x', 'y', 'z'],
         ]
+        indexes = [
+            # Builder room list: a world's rooms, newest first
+            models.Index(
+                fields=['world', '-created_ts'],
+                name='worlds_room_world_created_idx'),
+        ]
 
     @property
     def key(self):
-        return '%s.%s' % (
-            CamelCase__to__camel_case(self.__class__.__name__),
-            self.id)
+        model = CamelCase__to__camel_case(self.__class__.__name__)
+        return f'{model}.{self.id}'
 
     def get_game_key(self, spawn_world):
-        return '@{world_id}:{model}.{relative_id}'.format(
-            world_id=spawn_world.pk,
-            model=self.get_class_name(),
-            relative_id=self.id)
+        return f'@{spawn_world.pk}:{self.get_class_name()}.{self.id}'
 
     @property
     def data(self):
         "Returns core room data serialization"
-        simple_fields = [
-            'id', 'key', 'name', 'model_type', 'type', 'note', 'description',
-            'x', 'y', 'z', 'color',
-        ]
-        ref_fields = [
-            'north', 'east', 'south', 'west', 'up', 'down', 'zone',
-        ]
-        data = {}
-        for field in simple_fields:
-            data[field] = getattr(self, field)
-        for field in ref_fields:
-            data[field + '_id'] = getattr(self, field + '_id')
-        return data
+        return {
+            'id': self.id,
+            'key': self.key,
+            'name': self.name,
+            'model_type': self.model_type,
+            'type': self.type,
+            'note': self.note,
+            'description': self.description,
+            'x': self.x,
+            'y': self.y,
+            'z': self.z,
+            'color': self.color,
+            'north_id': self.north_id,
+            'east_id': self.east_id,
+            'south_id': self.south_id,
+            'west_id': self.west_id,
+            'up_id': self.up_id,
+            'down_id': self.down_id,
+            'zone_id': self.zone_id,
+        }
 
     def get_neighbor(self, direction):
         diff = adv_consts.DIR_COORD_DIFF[direction]
@@ -1215,8 +1307,9 @@ class Room(AdventWorldBaseModel):
         y = self.y + diff[1]
         z = self.z + diff[2]
         try:
+            # By world_id so the world row isn't loaded just for its pk
             return Room.objects.get(
-                world=self.world,
+                world_id=self.world_id,
                 x=x, y=y, z=z)
         except Room.DoesNotExist:
             return None
@@ -1224,8 +1317,11 @@ class Room(AdventWorldBaseModel):
     def get_inbound_exit_room(self, direction):
         rev_dir = adv_consts.REVERSE_DIRECTIONS[direction]
         qkwargs = {'%s_id' % rev_dir: self.pk}
+        # Full row on purpose: the exit actions save the returned room and
+        # serialize it for the map, so deferred columns would each cost a
+        # query of their own.
         try:
-            return Room.objects.filter(world=self.world).get(**qkwargs)
+            return Room.objects.filter(world_id=self.world_id).get(**qkwargs)
         except Room.DoesNotExist:
             return None
 
@@ -1238,24 +1334,33 @@ class Room(AdventWorldBaseModel):
         y = room.y + diff[1]
         z = room.z + diff[2]
 
-        # Make sure there isn't already a room there
+        # The new room is created already pointing back at this one.
+        reverse_exit = {}
+        if connect:
+            reverse_exit[adv_consts.REVERSE_DIRECTIONS[direction]] = room
+
+        # (world, x, y, z) is unique, so let the insert tell us whether
+        # there is already a room there. The savepoint keeps a conflict
+        # from breaking an enclosing transaction.
         try:
-            room = Room.objects.get(world=room.world, x=x, y=y, z=z)
+            with transaction.atomic():
+                new_room = Room.objects.create(
+                    world=room.world,
+                    type=room.type,
+                    zone_id=room.zone_id,
+                    name='Untitled Room',
+                    x=x, y=y, z=z,
+                    **reverse_exit)
+        except IntegrityError:
             raise ValueError("A room already exists %s." % direction)
-        except Room.DoesNotExist:
-            pass
 
-        new_room = Room.objects.create(
-            world=room.world,
-            type=room.type,
-            zone=room.zone,
-            name='Untitled Room',
-            x=x, y=y, z=z)
         if connect:
+            # Only the exit column changes; the insert above has already
+            # cleared the world's map.
+            Room.objects.filter(pk=room.pk).update(**{
+                direction: new_room,
+                'modified_ts': timezone.now()})
             setattr(room, direction, new_room)
-            room.save()
-            setattr(new_room, adv_consts.REVERSE_DIRECTIONS[direction], room)
-            new_room.save()
         return new_room
 
     def update_live_instances(self):
@@ -1279,12 +1384,45 @@ class Room(AdventWorldBaseModel):
 Room.connect_relative_id_post_save_signal()
 
 # On room save, empty out the world's full map
+# Set of world ids whose full_map clearing is deferred by bulk_room_context
+_bulk_room_world_ids = ContextVar('bulk_room_world_ids', default=None)
+
 def post_room_save(sender, **kwargs):
     room = kwargs['instance']
-    room.world.full_map = None
-    room.world.save(update_fields=['full_map'])
+    deferred_world_ids = _bulk_room_world_ids.get()
+    if deferred_world_ids is not None:
+        deferred_world_ids.add(room.world_id)
+        return
+
+    # Filtered UPDATE: no need to load the world, and no write at all if
+    # the map was already cleared.
+    World.objects.filter(
+        pk=room.world_id,
+        full_map__isnull=False,
+    ).update(full_map=None)
+    if Room.world.is_cached(room):
+        room.world.full_map = None
 models.signals.post_save.connect(post_room_save, Room)
 
+@contextmanager
+def bulk_room_context(world):
+    """
+    Save many rooms of a world while clearing its full_map only once, on
+    exit, rather than after each room save. If the block raises, the map is
+    left alone: the room writes are expected to be rolled back with it.
+    """
+    world_ids = {world.pk}
+    token = _bulk_room_world_ids.set(world_ids)
+    try:
+        yield
+    finally:
+        _bulk_room_world_ids.reset(token)
+    World.objects.filter(
+        pk__in=world_ids,
+        full_map__isnull=False,
+    ).update(full_map=None)
+    world.full_map = None
+
 
 class RoomDetail(AdventBaseModel):
 
@@ -6,6 +6,122 @@ from core.serializers import ReferenceField
 from worlds.models import Room, World, Zone, StartingEq
 
 
+# Lobby labels for attacks and effects. Built once and shared by every
+# serialized world.
+ATTACK_LABELS = {
+    'anathema': 'Anathema',
+    'attack': 'Attack',
+    'attackspell': 'Attack',
+    'backstab': 'Backstab',
+    'bash': 'Bash',
+    'blind': 'Blind',
+    'burn': 'Burn',
+    'burn_dot': 'Burn',
+    'cleave': 'Cleave',
+    'combust': 'Combust',
+    'compel': 'Compel',
+    'conditionaleffectattack': 'Attack',
+    'counter': 'Counter',
+    'crash': 'Crash',
+    'customattack': 'Attack',
+    'customdot': 'Attack',
+    'customhot': 'Attack',
+    'customheal': 'Attack',
+    'dancingslash': 'Dancing Slash',
+    'dazeattack': 'Attack',
+    'dotspell': 'Attack',
+    'effectattack': 'Attack',
+    'flare': 'Flare',
+    'flurry': 'Flurry',
+    'forcedmoveattack': 'Attack',
+    'freeze': 'Freeze',
+    'frostspike': 'Spike',
+    'gutpunch': 'Gut Punch',
+    'heal': 'Heal',
+    'healingspell': 'Attack',
+    'heartstrike': 'Heart Strike',
+    'hiltsmack': 'Hilt Smack',
+    'hotspell': 'Attack',
+    'hush': 'Hush',
+    'innervate': 'Innervate',
+    'jolt': 'Jolt',
+    'knee': 'Knee',
+    'lightningtorrent': 'Torrent',
+    'mend': 'Mend',
+    'meteor': 'Meteor',
+    'mistbornheal': 'Mistborn',
+    'quickstrike': 'Quick Strike',
+    'rage_dot': 'Rage',
+    'ravage': 'Ravage',
+    'repent_attack': 'Repent',
+    'repent_heal': 'Repent',
+    'roomdamage': 'Attack',
+    'secondwindheal': 'Second Wind',
+    'shieldslam': 'Shield Slam',
+    'sleep': 'Sleep',
+    'smash': 'Smash',
+    'splashattack': 'Attack',
+    'stomp': 'Stomp',
+    'wrack': 'Wrack',
+}
+
+EFFECT_LABELS = {
+    '': 'Effect',
+    'absorb': 'Effect',
+    'avatar': 'Avatar',
+    'barrier': 'Barrier',
+    'blind': 'Blind',
+    'brace': 'Brace',
+    'buff': 'Effect',
+    'burn': 'Burn',
+    'charged': 'Charged',
+    'compel': 'Compel',
+    'counter': 'Counter',
+    'dancingslash': 'Dancing Slash',
+    'daze': 'Daze',
+    'debuff': 'Effect',
+    'dispel': 'Effect',
+    'dot': 'DOT',
+    'freeze': 'Freeze',
+    'fury': 'Fury',
+    'haste': 'Effect',
+    'hot': 'HOT',
+    'immune': 'Phase Shift',
+    'innervate': 'Innervate',
+    'invisibility': 'Effect',
+    'maelstrom': 'Maelstrom',
+    'martyr': 'Martyr',
+    'mend': 'Mend',
+    'mistborn': 'Mistborn',
+    'mistform': 'Mistform',
+    'nightmare': 'Nightmare',
+    'purge': 'Purge',
+    'purify': 'Purify',
+    'quicken': 'Quicken',
+    'rage': 'Rage',
+    'seal': 'Seal',
+    'shield': 'Shield',
+    'silence': 'Silence',
+    'sleep': 'Sleep',
+    'static': 'Static',
+    'stealth': 'Effect',
+    'stun': 'Stun',
+    'summon': 'Effect',
+    'thrill': 'Thrill',
+    'ward': 'Ward',
+    'weave': 'Weave',
+    'will': 'Will',
+    'wind': 'Second Wind',
+    'winded': 'Winded',
+    'wrack': 'Wrack',
+}
+
+LABELS = {
+    'attacks': ATTACK_LABELS,
+    'effects': EFFECT_LABELS,
+}
+
+
 class UserSerializer(serializers.ModelSerializer):
 
     worlds = serializers.HyperlinkedRelatedField(
@@ -38,124 +154,18 @@ class WorldSerializer(serializers.ModelSerializer):
         )
 
     def get_labels(self, world):
-
-        attack_labels = {
-            'anathema': 'Anathema',
-            'attack': 'Attack',
-            'attackspell': 'Attack',
-            'backstab': 'Backstab',
-            'bash': 'Bash',
-            'blind': 'Blind',
-            'burn': 'Burn',
-            'burn_dot': 'Burn',
-            'cleave': 'Cleave',
-            'combust': 'Combust',
-            'compel': 'Compel',
-            'conditionaleffectattack': 'Attack',
-            'counter': 'Counter',
-            'crash': 'Crash',
-            'customattack': 'Attack',
-            'customdot': 'Attack',
-            'customhot': 'Attack',
-            'customheal': 'Attack',
-            'dancingslash': 'Dancing Slash',
-            'dazeattack': 'Attack',
-            'dotspell': 'Attack',
-            'effectattack': 'Attack',
-            'flare': 'Flare',
-            'flurry': 'Flurry',
-            'forcedmoveattack': 'Attack',
-            'freeze': 'Freeze',
-            'frostspike': 'Spike',
-            'gutpunch': 'Gut Punch',
-            'heal': 'Heal',
-            'healingspell': 'Attack',
-            'heartstrike': 'Heart Strike',
-            'hiltsmack': 'Hilt Smack',
-            'hotspell': 'Attack',
-            'hush': 'Hush',
-            'innervate': 'Innervate',
-            'jolt': 'Jolt',
-            'knee': 'Knee',
-            'lightningtorrent': 'Torrent',
-            'mend': 'Mend',
-            'meteor': 'Meteor',
-            'mistbornheal': 'Mistborn',
-            'quickstrike': 'Quick Strike',
-            'rage_dot': 'Rage',
-            'ravage': 'Ravage',
-            'repent_attack': 'Repent',
-            'repent_heal': 'Repent',
-            'roomdamage': 'Attack',
-            'secondwindheal': 'Second Wind',
-            'shieldslam': 'Shield Slam',
-            'sleep': 'Sleep',
-            'smash': 'Smash',
-            'splashattack': 'Attack',
-            'stomp': 'Stomp',
-            'wrack': 'Wrack',
-        }
-
-        effect_labels = {
-            '': 'Effect',
-            'absorb': 'Effect',
-            'avatar': 'Avatar',
-            'barrier': 'Barrier',
-            'blind': 'Blind',
-            'brace': 'Brace',
-            'buff': 'Effect',
-            'burn': 'Burn',
-            'charged': 'Charged',
-            'compel': 'Compel',
-            'counter': 'Counter',
-            'dancingslash': 'Dancing Slash',
-            'daze': 'Daze',
-            'debuff': 'Effect',
-            'dispel': 'Effect',
-            'dot': 'DOT',
-            'freeze': 'Freeze',
-            'fury': 'Fury',
-            'haste': 'Effect',
-            'hot': 'HOT',
-            'immune': 'Phase Shift',
-            'innervate': 'Innervate',
-            'invisibility': 'Effect',
-            'maelstrom': 'Maelstrom',
-            'martyr': 'Martyr',
-            'mend': 'Mend',
-            'mistborn': 'Mistborn',
-            'mistform': 'Mistform',
-            'nightmare': 'Nightmare',
-            'purge': 'Purge',
-            'purify': 'Purify',
-            'quicken': 'Quicken',
-            'rage': 'Rage',
-            'seal': 'Seal',
-            'shield': 'Shield',
-            'silence': 'Silence',
-            'sleep': 'Sleep',
-            'static': 'Static',
-            'stealth': 'Effect',
-            'stun': 'Stun',
-            'summon': 'Effect',
-            'thrill': 'Thrill',
-            'ward': 'Ward',
-            'weave': 'Weave',
-            'will': 'Will',
-            'wind': 'Second Wind',
-            'winded': 'Winded',
-            'wrack': 'Wrack',
-        }
-
-        return {
-            'attacks': attack_labels,
-            'effects': effect_labels,
-        }
+        return LABELS
 
     def get_is_classless(self, world):
-        root_world = world.context or world
-        root_world = root_world.instance_of or root_world
-        return root_world.config.is_classless
+        # Worlds in a listing often share a root world, so resolve each
+        # root's config once per serialization.
+        cache = self.context.setdefault('_classless_by_root', {})
+        context = world.context if world.context_id else world
+        root_id = context.instance_of_id or context.id
+        if root_id not in cache:
+            root_world = context.instance_of or context
+            cache[root_id] = root_world.config.is_classless
+        return cache[root_id]
 
     def get_instance_of_id(self, world):
         context = world.context or world
@@ -18,6 +18,18 @@ class WorldSmith:
             raise ServiceError("Can only act on spawn worlds.")
         self.world = world
 
+    def _instances(self):
+        """
+        Spawned instances of this world, joined with what stopping or
+        killing each of them reads (instance template, base world and its
+        config, nexus) and without their large text columns.
+        """
+        return World.objects.lean().filter(
+            context__instance_of=self.world.context,
+        ).select_related(
+            'context__instance_of__config',
+            'nexus')
+
     def start_preflight(self, staff_request=False):
         world = self.world
 
@@ -35,8 +47,10 @@ class WorldSmith:
             except SiteControl.DoesNotExist:
                 pass
 
-        # don't start a world being actively cleaned up
-        if WorldLocks.check_ongoing_cleanup(world):
+        # don't start a world being actively cleaned up. The world row
+        # mirrors the lock, so the lock is only consulted when it's set.
+        if (world.clean_start_ts is not None
+                and WorldLocks.check_ongoing_cleanup(world)):
             raise ServiceError("World is being cleaned up. Please wait.")
 
         if self.world.lifecycle not in [
@@ -112,14 +126,13 @@ class WorldSmith:
         Actually stop the MPW after the 30 seconds warning notice has elapsed.
         """
         spawn_world = self.world
-        spawn_world.set_state(api_consts.WORLD_STATE_STOPPING)
+        # Straight to STOPPED: a STOPPING write here would be overwritten
+        # immediately, costing an UPDATE and a builder admin publish.
         spawn_world.set_state(api_consts.WORLD_STATE_STOPPED)
 
         # Stop any instances from this world
         if spawn_world.is_multiplayer:
-            instances = World.objects.filter(
-                context__instance_of=spawn_world.context)
-            for instance in instances:
+            for instance in self._instances():
                 print('--- stopping %s' % instance)
                 WorldSmith(instance).stop_mpw()
 
@@ -134,9 +147,7 @@ class WorldSmith:
 
         # Kill any instances from this world
         if spawn_world.is_multiplayer:
-            instances = World.objects.filter(
-                context__instance_of=spawn_world.context)
-            for instance in instances:
+            for instance in self._instances():
                 print('--- killing %s' % instance)
                 WorldSmith(instance).kill()
 
@@ -1,6 +1,7 @@
 import logging
 
 from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
 from django.utils import timezone
 from django.core.cache import cache
 
@@ -33,6 +34,19 @@ def _loader_lock_timeout_seconds() -> int:
     return max(int(_loader_interval_seconds() * 4), 30)
 
 
+def _get_world(world_id, for_update=False):
+    """
+    Load a spawn world along with the relations WorldSmith reads while
+    starting, stopping or killing it. With for_update, the world's row (and
+    only that row, the joins being outer joins) is locked until the end of
+    the transaction.
+    """
+    qs = World.objects.select_related('context__instance_of', 'nexus')
+    if for_update:
+        qs = qs.select_for_update(of=('self',))
+    return qs.get(pk=world_id)
+
+
 @shared_task
 def start_world(world_id, user_id=None, client_id=None):
     """
@@ -42,23 +56,26 @@ def start_world(world_id, user_id=None, client_id=None):
         world_id (int): The ID of the world to start.
         user_id (int): The ID of the user who started the world.
     """
-    world = World.objects.get(pk=world_id)
-    print("Starting world %s [ %s ]..." % (world.name, world.id))
-
-    try:
-        user = None
-        if user_id:
-            user = User.objects.filter(id=user_id).first()
-        staff_request = user.is_staff if user else False
-        WorldSmith(world).start(staff_request=staff_request)
-    except Exception as e:
-        if client_id:
-            complete_job(
-                client_id=client_id,
-                job="start_world",
-                data={'error': str(e)},
-                status='error')
-        raise e
+    # Hold the world's row while starting it, so that a duplicate start
+    # waits for this one and then fails preflight instead of running too.
+    with transaction.atomic():
+        world = _get_world(world_id, for_update=True)
+        logger.info("Starting world %s [ %s ]...", world.name, world.id)
+
+        try:
+            user = None
+            if user_id:
+                user = User.objects.filter(id=user_id).first()
+            staff_request = user.is_staff if user else False
+            WorldSmith(world).start(staff_request=staff_request)
+        except Exception as e:
+            if client_id:
+                complete_job(
+                    client_id=client_id,
+                    job="start_world",
+                    data={'error': str(e)},
+                    status='error')
+            raise e
 
     # Notify the user who requested the job
     #ForgeConsumer.notify_user(user_id=user_id, message="World started.")
@@ -70,23 +87,26 @@ def start_world(world_id, user_id=None, client_id=None):
 
 @shared_task
 def request_stop(world_id, client_id=None):
-    world = World.objects.get(pk=world_id)
-
-    try:
-        WorldSmith(world).request_stop(client_id=client_id)
-    except Exception as e:
-        if client_id:
-            complete_job(
-                client_id=client_id,
-                job="stop_world",
-                data={'error': str(e)},
-                status='error')
-        raise e
+    # Same as start_world: a duplicate request waits, then sees the world
+    # is no longer running.
+    with transaction.atomic():
+        world = _get_world(world_id, for_update=True)
+
+        try:
+            WorldSmith(world).request_stop(client_id=client_id)
+        except Exception as e:
+            if client_id:
+                complete_job(
+                    client_id=client_id,
+                    job="stop_world",
+                    data={'error': str(e)},
+                    status='error')
+            raise e
 
 
 @shared_task
 def stop_world(world_id, client_id=None):
-    world = World.objects.get(pk=world_id)
+    world = _get_world(world_id)
 
     try:
         WorldSmith(world).stop()
@@ -107,7 +127,7 @@ def stop_world(world_id, client_id=None):
 
 @shared_task
 def kill_world(world_id, client_id=None):
-    world = World.objects.get(pk=world_id)
+    world = _get_world(world_id)
 
     try:
         WorldSmith(world).kill()
@@ -132,76 +152,78 @@ def monitor_worlds():
     # Go through each world marked as running in the Forge and verify
     # that they still are, and that everything is in order in the game
     # data.
-    running_worlds = World.objects.filter(
-        context__isnull=False,
-        lifecycle=constants.WORLD_LIFECYCLE_RUNNING,
-        lifecycle_change_ts__isnull=False,)
-
-    for spawn_world in running_worlds:
-        logger.info("Examining world %s" % spawn_world.key)
-
-        # The last checks have to do with idling worlds (MPWs with no
-        # connected players). We exclude tier 3 MPWs, which always run.
-        if (spawn_world.is_multiplayer and
-           spawn_world.context.tier == 3):
-            continue
 
+    # Idle and stuck durations are all measured from the start of the run
+    now = timezone.now()
+
+    # Look for idle worlds (worlds with no connected players) and stop them.
+    # Everything that makes a world idle is checked in the query, so only
+    # the worlds to stop come back.
+    # 5 minutes, might be worth making this configurable
+    MAX_WORLD_IDLE = 5 * 60
+    idle_worlds = World.objects.lean().filter(
+        Q(last_played_ts__isnull=True)
+        | Q(last_played_ts__lt=now - timezone.timedelta(
+            seconds=MAX_WORLD_IDLE)),
         # If the world has players in it, we don't consider it idle.
-        if Player.objects.filter(world=spawn_world, in_game=True).exists():
-            continue
-
+        ~Exists(Player.objects.filter(world=OuterRef('pk'), in_game=True)),
         # If the world still has player in instasnces, we don't consider it
         # idle since they could come back out anytime.
-        if Player.objects.filter(
-            world__context__instance_of=spawn_world.context).exists():
-            continue
-
-        # 5 minutes, might be worth making this configurable
-        MAX_WORLD_IDLE = 5 * 60
-        last_played_on_ts = spawn_world.last_played_ts
-        if last_played_on_ts:
-            delta = (timezone.now() - last_played_on_ts).total_seconds()
-        else: # Set it to a high mark
-            delta = MAX_WORLD_IDLE + 100
-        if delta > MAX_WORLD_IDLE:
-            logger.info("World is idle for %s seconds, stopping..." % delta)
-            # Start the stopping process
-            WorldSmith(spawn_world).stop()
-            continue
-
-    # Look for stuck worlds
-    wip_worlds = World.objects.filter(
+        ~Exists(Player.objects.filter(
+            world__context__instance_of=OuterRef('context'))),
         context__isnull=False,
-        lifecycle_change_ts__isnull=False
+        lifecycle=constants.WORLD_LIFECYCLE_RUNNING,
+        lifecycle_change_ts__isnull=False,
+    ).exclude(
+        # We exclude tier 3 MPWs, which always run.
+        is_multiplayer=True,
+        context__tier=3,
+    ).select_related('context').defer(*[
+        'context__%s' % field for field in World.objects.LEAN_DEFERRED_FIELDS
+    ])
+    for spawn_world in idle_worlds:
+        logger.info("World %s is idle, stopping..." % spawn_world.key)
+        # Start the stopping process
+        WorldSmith(spawn_world).stop()
+
+    # Look for worlds stuck for more than 5 minutes in a transitional state
+    five_min_ago = now - timezone.timedelta(seconds=300)
+    wip_worlds = World.objects.lean().filter(
+        context__isnull=False,
+        lifecycle_change_ts__lt=five_min_ago,
     ).exclude(lifecycle__in=[
         constants.WORLD_LIFECYCLE_RUNNING,
         constants.WORLD_LIFECYCLE_NEW,
         constants.WORLD_LIFECYCLE_STOPPED])
     for world in wip_worlds:
-        # Calculate how long it's been since the world has been in this state
-        delta = (timezone.now() - world.lifecycle_change_ts).total_seconds()
-        # If it's been stuck for more than 5 minutes, kill it
-        if delta > 300:
-            logger.info(
-                "World %s has been stuck in %s for %s seconds, killing..." % (
-                world.key, world.lifecycle, delta))
-            WorldSmith(world).kill()
-
-    # Look for instances that have been stored for more than 5 minutes
-    five_min_ago = timezone.now() - timezone.timedelta(seconds=300)
+        delta = (now - world.lifecycle_change_ts).total_seconds()
+        logger.info(
+            "World %s has been stuck in %s for %s seconds, killing..." % (
+            world.key, world.lifecycle, delta))
+        WorldSmith(world).kill()
+
+    # Look for instances that have been stored for more than 5 minutes.
+    # Only their ids and players are read.
     stored_instances = World.objects.filter(
         context__isnull=False,
         context__instance_of__isnull=False,
         lifecycle=constants.WORLD_LIFECYCLE_STOPPED,
-        lifecycle_change_ts__lt=five_min_ago)
+        lifecycle_change_ts__lt=five_min_ago,
+    ).only('id').prefetch_related('players')
+    stored_instance_ids = []
     for instance in stored_instances:
         logger.info("Deleting idle instance %s..." % instance.id)
         for player in instance.players.all():
             World.leave_instance(player)
-        # Redundant but we want to be absolutely sure we don't delete
-        # player data.
-        if instance.players.count() == 0:
-            instance.delete()
+        stored_instance_ids.append(instance.id)
+    # Redundant but we want to be absolutely sure we don't delete player
+    # data, so the emptiness check is part of the single delete. It
+    # queries afresh since instance.players would answer from the prefetch.
+    if stored_instance_ids:
+        World.objects.filter(
+            ~Exists(Player.objects.filter(world=OuterRef('pk'))),
+            pk__in=stored_instance_ids,
+        ).delete()
 
 
 @shared_task(ignore_result=True)
@@ -1,18 +1,24 @@
-from mock import patch
+from mock import Mock, patch
 
 from config import constants as adv_consts
 
 from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
 
 from rest_framework.reverse import reverse
 from rest_framework.test import APIRequestFactory, APITestCase
 
 from config import constants as api_consts
+from config.exceptions import ServiceError
+from builders.models import Faction
 from tests.base import WorldTestCase
 from spawns.models import Player, Item, Equipment, Mob, PlayerEvent
-from worlds.models import Room, World, Zone, WorldConfig, InstanceAssignment
+from worlds.models import (
+    InstanceAssignment, Room, RoomFlag, World, WorldConfig, WorldLocks, Zone)
+from worlds.serializers import WorldSerializer
 from worlds.services import WorldSmith
+from worlds.tasks import _get_world, monitor_worlds, start_world
 
 
 class WorldBasicTestCase(WorldTestCase):
@@ -97,6 +103,309 @@ class RoomTestCase(APITestCase):
         self.assertEqual(world2room2.relative_id, 2)
 
 
+class WorldMapTests(WorldTestCase):
+
+    def test_get_map(self):
+        east = self.room.create_at('east')
+        RoomFlag.objects.create(room=east, code=adv_consts.ROOM_FLAGS[0])
+
+        with self.assertNumQueries(3):
+            rooms = self.world.get_map()
+
+        self.assertEqual(set(rooms), {self.room.key, east.key})
+        room_data = rooms[self.room.key]
+        expected = self.room.data
+        for field in ('id', 'key', 'name', 'model_type', 'x', 'y', 'z'):
+            self.assertEqual(room_data[field], expected[field])
+        self.assertEqual(room_data['east']['key'], east.key)
+        self.assertIsNone(room_data['west'])
+        self.assertEqual(room_data['zone']['key'], self.zone.key)
+        self.assertEqual(room_data['flags'], [])
+        self.assertEqual(
+            rooms[east.key]['flags'], [adv_consts.ROOM_FLAGS[0]])
+        self.assertEqual(rooms[east.key]['west']['key'], self.room.key)
+
+
+    def test_prefetch_map_resolves_exits_in_memory(self):
+        east = self.room.create_at('east')
+        far_east = east.create_at('east')
+        RoomFlag.objects.create(room=east, code=adv_consts.ROOM_FLAGS[0])
+        self.room.refresh_from_db()
+
+        # far_east is outside of the set, so it is the only exit looked up
+        with self.assertNumQueries(3):
+            rooms = Room.objects.prefetch_map(
+                Room.objects.filter(pk__in=[self.room.pk, east.pk]))
+            by_id = {room.id: room for room in rooms}
+            self.assertEqual(by_id[self.room.pk].east.key, east.key)
+            self.assertEqual(by_id[east.pk].west, by_id[self.room.pk])
+            self.assertEqual(by_id[east.pk].east.name, far_east.name)
+            self.assertEqual(by_id[east.pk].zone, self.zone)
+            self.assertEqual(
+                [flag.code for flag in by_id[east.pk].flags.all()],
+                [adv_consts.ROOM_FLAGS[0]])
+
+
+class RoomTests(WorldTestCase):
+
+    def test_neighbor_lookups_skip_world(self):
+        east = self.room.create_at('east')
+        room = Room.objects.get(pk=self.room.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(room.get_neighbor('east'), east)
+        east = Room.objects.get(pk=east.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(east.get_inbound_exit_room('west'), room)
+
+    def test_create_at_connects_both_ways(self):
+        room = Room.objects.get(pk=self.room.pk)
+        # Savepoint, world, insert, relative id assignment (3), two map
+        # clears (create and relative id save), release, exit update.
+        with self.assertNumQueries(10):
+            east = room.create_at('east')
+        self.assertEqual(room.east, east)
+        self.assertEqual(Room.objects.get(pk=room.pk).east_id, east.pk)
+        self.assertEqual(Room.objects.get(pk=east.pk).west_id, room.pk)
+
+    def test_create_at_existing_room(self):
+        east = self.room.create_at('east')
+        room = Room.objects.get(pk=self.room.pk)
+        with self.assertRaises(ValueError):
+            room.create_at('east')
+        self.assertEqual(Room.objects.get(pk=self.room.pk).east, east)
+        self.assertEqual(
+            Room.objects.filter(world=self.world, x=east.x, y=east.y,
+                                z=east.z).count(), 1)
+
+    def test_room_save_clears_full_map(self):
+        World.objects.filter(pk=self.world.pk).update(full_map='{}')
+        room = Room.objects.get(pk=self.room.pk)
+        with self.assertNumQueries(2):
+            room.save(update_fields=['name'])
+        self.assertIsNone(World.objects.get(pk=self.world.pk).full_map)
+
+
+class WorldHierarchyTests(WorldTestCase):
+
+    def test_with_hierarchy(self):
+        with self.assertNumQueries(1):
+            world = World.objects.with_hierarchy().get(pk=self.spawn_world.pk)
+            self.assertEqual(world.effective_config, self.world_config)
+            self.assertEqual(world.nexus_name, 'nexus-sandbox')
+            self.assertEqual(world.cluster_id, self.world.id)
+
+    def test_running_worlds_defer_large_fields(self):
+        World.objects.filter(pk=self.spawn_world.pk).update(
+            lifecycle=api_consts.WORLD_STATE_RUNNING)
+        world = self.world.get_running_worlds().get()
+        self.assertTrue(
+            set(World.objects.LEAN_DEFERRED_FIELDS)
+            <= world.get_deferred_fields())
+
+    def test_nexus_names_resolved_once(self):
+        world = World.objects.get(pk=self.spawn_world.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(world.pod_name, 'nexus-sandbox-pod')
+            self.assertEqual(world.ingress_name, 'nexus-sandbox-ingress')
+            self.assertEqual(world.ingress_path, '/websocket/nexus-sandbox/')
+            self.assertEqual(world.cluster_id, self.world.id)
+
+
+class WorldFactionsTests(WorldTestCase):
+
+    def test_factions_cached_on_instance(self):
+        Faction.objects.create(world=self.world, code='human', name='Human')
+        world = World.objects.get(pk=self.world.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(world.factions, {
+                'human': {'code': 'human', 'name': 'Human'}})
+            world.factions
+
+
+class WorldSaveDataTests(WorldTestCase):
+
+    def test_save_data_clears_marker(self):
+        game_world = Mock(facts={'weather': 'rain'})
+        self.spawn_world.save_data(game_world=game_world)
+        self.spawn_world.refresh_from_db()
+        self.assertIsNone(self.spawn_world.save_start_ts)
+        self.assertEqual(game_world.facts, {'weather': 'rain'})
+
+    def test_save_data_skips_when_already_saving(self):
+        started = timezone.now()
+        World.objects.filter(pk=self.spawn_world.pk).update(
+            save_start_ts=started)
+        game_world = Mock(facts=None)
+        self.spawn_world.save_data(game_world=game_world)
+        # The in-flight save keeps its marker and facts are untouched
+        self.spawn_world.refresh_from_db()
+        self.assertEqual(self.spawn_world.save_start_ts, started)
+        self.assertIsNone(game_world.facts)
+
+
+class WorldLifecycleTests(WorldTestCase):
+
+    def test_set_lifecycle_single_query(self):
+        with self.assertNumQueries(1):
+            self.spawn_world.set_lifecycle(api_consts.WORLD_STATE_RUNNING)
+        self.assertEqual(self.spawn_world.lifecycle,
+                         api_consts.WORLD_STATE_RUNNING)
+        self.assertIsNotNone(self.spawn_world.lifecycle_change_ts)
+        world = World.objects.get(pk=self.spawn_world.pk)
+        self.assertEqual(world.lifecycle, api_consts.WORLD_STATE_RUNNING)
+        self.assertEqual(world.lifecycle_change_ts,
+                         self.spawn_world.lifecycle_change_ts)
+
+    def test_stop_mpw_skips_transient_state(self):
+        smith = WorldSmith(self.spawn_world)
+        with patch.object(World, 'set_state') as set_state, \
+             patch.object(World, 'cleanup'):
+            smith.stop_mpw()
+        self.assertEqual(
+            [c.args[0] for c in set_state.call_args_list],
+            [api_consts.WORLD_STATE_STOPPED, api_consts.WORLD_STATE_STORED])
+
+    def test_start_cleanup_creates_missing_lock(self):
+        WorldLocks.objects.filter(world=self.spawn_world).delete()
+        WorldLocks.start_cleanup(self.spawn_world)
+        self.assertIsNotNone(
+            WorldLocks.objects.get(world=self.spawn_world).clean_start_ts)
+        with self.assertRaises(Exception):
+            WorldLocks.start_cleanup(self.spawn_world)
+
+    def test_end_cleanup_releases_lock(self):
+        WorldLocks.start_cleanup(self.spawn_world)
+        self.assertIsNotNone(
+            WorldLocks.check_ongoing_cleanup(self.spawn_world))
+        with self.assertNumQueries(2):
+            WorldLocks.end_cleanup(self.spawn_world)
+        self.assertIsNone(WorldLocks.check_ongoing_cleanup(self.spawn_world))
+
+    def test_start_preflight_checks_lock_only_during_cleanup(self):
+        smith = WorldSmith(World.objects.get(pk=self.spawn_world.pk))
+        with self.assertNumQueries(0):
+            smith.start_preflight(staff_request=True)
+
+        WorldLocks.start_cleanup(self.spawn_world)
+        smith = WorldSmith(World.objects.get(pk=self.spawn_world.pk))
+        with self.assertRaises(ServiceError):
+            smith.start_preflight(staff_request=True)
+
+
+class MonitorWorldsTests(WorldTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.spawn_world.set_lifecycle(api_consts.WORLD_LIFECYCLE_RUNNING)
+
+    @patch('worlds.tasks.WorldSmith')
+    def test_idle_world_stopped(self, smith):
+        monitor_worlds()
+        smith.assert_called_once_with(self.spawn_world)
+        smith.return_value.stop.assert_called_once_with()
+
+    @patch('worlds.tasks.WorldSmith')
+    def test_world_with_players_in_game_kept(self, smith):
+        Player.objects.filter(pk=self.player.pk).update(in_game=True)
+        # Idle, stuck and stored scans; no per-world player checks
+        with self.assertNumQueries(3):
+            monitor_worlds()
+        smith.assert_not_called()
+
+    @patch('worlds.tasks.WorldSmith')
+    def test_recently_played_world_kept(self, smith):
+        World.objects.filter(pk=self.spawn_world.pk).update(
+            last_played_ts=timezone.now())
+        monitor_worlds()
+        smith.assert_not_called()
+
+    @patch('worlds.tasks.WorldSmith')
+    def test_stuck_world_killed(self, smith):
+        World.objects.filter(pk=self.spawn_world.pk).update(
+            lifecycle=api_consts.WORLD_LIFECYCLE_STARTING,
+            lifecycle_change_ts=timezone.now() - timezone.timedelta(
+                seconds=600))
+        monitor_worlds()
+        smith.assert_called_once_with(self.spawn_world)
+        smith.return_value.kill.assert_called_once_with()
+
+    def _stored_instances(self):
+        "Two instances, each holding a player, stored long enough to go."
+        Player.objects.filter(pk=self.player.pk).update(in_game=True)
+        World.objects.filter(
+            pk__in=[self.world.pk, self.spawn_world.pk]
+        ).update(is_multiplayer=True)
+        instance_context = World.objects.new_world(
+            name='An Instance',
+            author=self.user,
+            config=WorldConfig.objects.create(),
+            is_multiplayer=True,
+            instance_of=self.world)
+        instances = [
+            World.enter_instance(
+                player=self.create_player('Player %s' % i),
+                transfer_to_id=instance_context.config.starting_room_id,
+                transfer_from_id=self.room.id)
+            for i in range(2)]
+        World.objects.filter(pk__in=[i.pk for i in instances]).update(
+            lifecycle=api_consts.WORLD_LIFECYCLE_STOPPED,
+            lifecycle_change_ts=timezone.now() - timezone.timedelta(
+                seconds=600))
+        return instances
+
+    @patch('worlds.tasks.WorldSmith')
+    def test_stored_instances_deleted(self, smith):
+        instances = self._stored_instances()
+        monitor_worlds()
+
+        self.assertFalse(
+            World.objects.filter(pk__in=[i.pk for i in instances]).exists())
+        self.assertEqual(
+            Player.objects.filter(world=self.spawn_world).count(), 3)
+
+    @patch('worlds.tasks.WorldSmith')
+    def test_stored_instances_with_players_kept(self, smith):
+        instances = self._stored_instances()
+        with patch.object(World, 'leave_instance'):
+            monitor_worlds()
+        self.assertEqual(
+            World.objects.filter(pk__in=[i.pk for i in instances]).count(),
+            2)
+
+    @patch.object(World, 'update_builder_admin')
+    def test_start_world_task(self, update_builder_admin):
+        spawn_world = self.world.create_spawn_world()
+        start_world(spawn_world.pk)
+        spawn_world.refresh_from_db()
+        self.assertEqual(spawn_world.lifecycle,
+                         api_consts.WORLD_LIFECYCLE_RUNNING)
+        with self.assertRaises(ServiceError):
+            start_world(spawn_world.pk)
+
+    def test_task_world_joined(self):
+        with self.assertNumQueries(1):
+            world = _get_world(self.spawn_world.pk)
+            self.assertEqual(world.context, self.world)
+            self.assertIsNone(world.context.instance_of)
+            self.assertIsNone(world.nexus)
+
+
+class WorldSerializerTests(WorldTestCase):
+
+    def test_is_classless_resolved_once_per_root(self):
+        World.objects.create(
+            name='Another Island', context=self.world, author=self.user)
+        worlds = list(World.objects.filter(
+            context=self.world).select_related('context'))
+        self.assertEqual(len(worlds), 2)
+
+        serializer = WorldSerializer(context={})
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                [serializer.get_is_classless(world) for world in worlds],
+                [self.world_config.is_classless] * 2)
+
+
 class NewWorldCreation(TestCase):
 
     def test_new_world(self):
@@ -322,6 +631,89 @@ class InstanceEntranceTests(WorldTestCase):
         self.assertEqual(instance_assignment.transfer_from, self.room)
         self.assertEqual(instance.leader, self.player)
 
+    def test_world_smith_instances_joined(self):
+        instance = self.instance_context.instance_for(
+            player=self.player,
+            transfer_from=self.room)
+        with self.assertNumQueries(1):
+            instances = list(WorldSmith(self.spawn_world)._instances())
+            self.assertEqual(instances, [instance])
+            self.assertEqual(
+                instances[0].context.instance_of.config, self.world_config)
+            self.assertIsNone(instances[0].nexus)
+
+    def test_leave_instance(self):
+        self.world.is_multiplayer = True
+        self.world.save(update_fields=['is_multiplayer'])
+        World.objects.filter(pk=self.spawn_world.pk).update(
+            is_multiplayer=True)
+        instance = World.enter_instance(
+            player=self.player,
+            transfer_to_id=self.instance_context.config.starting_room_id,
+            transfer_from_id=self.room.id)
+        bag = Item.objects.create(
+            world=instance, container=self.player, name='a bag',
+            type=adv_consts.ITEM_TYPE_CONTAINER)
+        book = Item.objects.create(
+            world=instance, container=bag, name='a book')
+        sword = Item.objects.create(
+            world=instance, container=self.player.equipment, name='a sword')
+        elsewhere = Item.objects.create(
+            world=instance, container=self.room, name='a rock')
+
+        player = Player.objects.get(pk=self.player.pk)
+        with self.assertNumQueries(7):
+            World.leave_instance(player=player)
+
+        self.player.refresh_from_db()
+        self.assertEqual(self.player.world, self.spawn_world)
+        self.assertEqual(self.player.room, self.room)
+        for item in (bag, book, sword):
+            item.refresh_from_db()
+            self.assertEqual(item.world_id, self.spawn_world.id)
+        elsewhere.refresh_from_db()
+        self.assertEqual(elsewhere.world_id, instance.id)
+
+    def test_bulk_leave_instance(self):
+        self.world.is_multiplayer = True
+        self.world.save(update_fields=['is_multiplayer'])
+        World.objects.filter(pk=self.spawn_world.pk).update(
+            is_multiplayer=True)
+        instance = World.enter_instance(
+            player=self.player,
+            transfer_to_id=self.instance_context.config.starting_room_id,
+            transfer_from_id=self.room.id)
+        east = self.room.create_at('east')
+        self.world_config.starting_room = east
+        self.world_config.save()
+        # A player in the instance without an assignment
+        stray = Player.objects.create(
+            name='Jane', world=instance, room=self.room, user=self.user)
+        bag = Item.objects.create(
+            world=instance, container=stray, name='a bag',
+            type=adv_consts.ITEM_TYPE_CONTAINER)
+        book = Item.objects.create(
+            world=instance, container=bag, name='a book')
+        sword = Item.objects.create(
+            world=instance, container=self.player.equipment, name='a sword')
+        elsewhere = Item.objects.create(
+            world=instance, container=self.room, name='a rock')
+
+        with self.assertNumQueries(7):
+            instance.bulk_leave_instance()
+
+        self.player.refresh_from_db()
+        stray.refresh_from_db()
+        self.assertEqual(self.player.world, self.spawn_world)
+        self.assertEqual(self.player.room, self.room)
+        self.assertEqual(stray.world, self.spawn_world)
+        self.assertEqual(stray.room, east)
+        for item in (bag, book, sword):
+            item.refresh_from_db()
+            self.assertEqual(item.world_id, self.spawn_world.id)
+        elsewhere.refresh_from_db()
+        self.assertEqual(elsewhere.world_id, instance.id)
+
     def test_group_enters_instance(self):
         "A group of players enters an instance"
         player2 = Player.objects.create(
@@ -348,6 +740,28 @@ class InstanceEntranceTests(WorldTestCase):
 
         self.assertEqual(InstanceAssignment.objects.count(), 2)
 
+    def test_reentry_records_member_ids(self):
+        "Re-entering an instance fills in member ids once, without a save"
+        instance = self.instance_context.instance_for(
+            player=self.player,
+            transfer_from=self.room)
+        self.assertEqual(InstanceAssignment.objects.get().member_ids, '')
+
+        with self.assertNumQueries(3):
+            self.instance_context.instance_for(
+                player=self.player,
+                transfer_from=self.room,
+                member_ids=['2', '3'])
+        self.assertEqual(InstanceAssignment.objects.get().member_ids, '2 3')
+
+        # Existing member ids are left alone
+        self.instance_context.instance_for(
+            player=self.player,
+            transfer_from=self.room,
+            ref=instance.instance_ref,
+            member_ids=['4'])
+        self.assertEqual(InstanceAssignment.objects.get().member_ids, '2 3')
+
     def test_player_enters_solo_then_joins_group(self):
         """
         Test for a player first entering an instance solo, then exiting it to
@@ -68,3 +68,28 @@ class TestLoginLink(APITestCase):
             'email': self.user.email.upper(),
         })
         self.assertEqual(resp.status_code, 201)
+
+    def test_login_link_confirm_non_ascii_token(self):
+        resp = self.client.post(self.confirm_endpoint, {
+            'token': 'tökén',
+        })
+        self.assertEqual(resp.status_code, 400)
+
+    def test_login_link_confirm_used_or_expired(self):
+        LoginLinkRequest.objects.create(
+            user=self.user,
+            code_hash=hashlib.sha256(b'used').hexdigest(),
+            used_ts=timezone.now(),
+            expires_ts=timezone.now() + timedelta(minutes=10))
+        LoginLinkRequest.objects.create(
+            user=self.user,
+            code_hash=hashlib.sha256(b'expired').hexdigest(),
+            expires_ts=timezone.now() - timedelta(minutes=1))
+
+        for token in ('used', 'expired'):
+            resp = self.client.post(self.confirm_endpoint, {
+                'token': token,
+            })
+            self.assertEqual(resp.status_code, 400)
+            self.assertEqual(
+                resp.data['token'][0], 'Invalid or expired login link.')